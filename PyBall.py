@@ -1,148 +1,226 @@
 import sys
-import json
 import pygame
 import colorsys
 
-from math import atan2, cos, sin
-from random import randint, choice
-from os import path, makedirs
-from dataclasses import dataclass
-from typing import List, Tuple, Union
-from cryptography.fernet import Fernet
+from math import radians
+from array import array
+from functools import lru_cache
+from itertools import count
+from random import Random, getrandbits
+from time import perf_counter, strftime
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+from simulation import (
+    BALL_DAMAGE,
+    BALL_RADIUS,
+    BALL_SPAWN_TICKS,
+    BLOCK_SIZE,
+    DEFAULT_FPS,
+    SWARM_SPAWN_TICKS,
+    TICK_RATE,
+    BallStates,
+    Board,
+    GameCodes,
+    Point,
+    bounce_off_block,
+    bounce_off_walls,
+    damage_block,
+    find_in_grid,
+    get_aim_angle,
+    get_block_sides,
+    get_gather_ticks,
+    get_gather_x,
+    get_line_top,
+    get_shot_speed,
+    level_exist,
+    load_level,
+)
+from bot import Bot
+from assets import AssetManager
+from audio import SoundDispatcher
+from savegame import SaveManager, record_level
+from replay import Replay
+from profiler import CpuMeter, FrameProfiler
+from trajectory import trace_path
+from widgets import Button, ButtonStyle, Label, grid_layout
+
+assets = AssetManager()
 
 pygame.mixer.pre_init()
 pygame.init()
 pygame.font.init()
 
 pygame.display.set_caption('PyBall')
+assets.mark('pygame.init')
 
 # КОНФИГУРАЦИЯ #
-DEFAULT_FPS = 240
+# Ускорение времени: во сколько раз больше тиков за кадр, None — мгновенно
+SPEED_MODES = (1, 4, 16, None)
+# Сколько миллисекунд отставания физика может догнать за один кадр
+MAX_LAG = 100
+# Сколько миллисекунд кадра можно отдать физике. Если тысячи шариков
+# не успевают, ход замедляется, а частота кадров остаётся прежней
+PHYSICS_BUDGET = 10
+
+# Прицел показывает путь шарика с первыми отскоками вместо прямой линии
+AIM_PREVIEW = True
+AIM_PREVIEW_BOUNCES = 3
+# Путь прицела запоминается для углов с таким шагом
+AIM_ANGLE_STEP = radians(0.25)
 
 GRAVITY = 0.1
 
-LEVEL_WIDTH = 9
-LEVEL_HEIGHT = 10
+# Размер окна в блоках; уровни больше окна прокручиваются камерой
+VIEW_WIDTH = 9
+VIEW_HEIGHT = 10
+# Место под нижней линией для счёта и числа шариков
+HUD_HEIGHT = 150
+# Прокрутка камеры стрелками (пикселей в секунду) и колесом мыши
+CAMERA_SPEED = 600
+CAMERA_WHEEL_STEP = BLOCK_SIZE
 
 PARTICLES_COLOR = (87, 104, 250)
 PARTICLES_COUNT = 20
+PARTICLES_LIMIT = 600
+PARTICLE_SIZES = (5, 10, 20)
 
-BLOCK_SIZE = 40
-BLOCK_KILL_NUMBER = 0
-
-BALL_RADIUS = 5
-BALL_SPEED = 1
-BALL_DAMAGE = 1
 BALL_COLOR = 'white'
+# Больше шариков на экране — и их прямоугольники не отслеживаются,
+# а перерисовывается весь экран
+BATCH_DIRTY_LIMIT = 200
+
+BLOCK_HUE_STEP = 15
+# Сколько готовых картинок блоков (по прочности) держать в памяти
+BLOCK_CACHE_SIZE = 256
+
+# Печатать, сколько времени ушло на запуск до первого кадра
+SHOW_STARTUP_TIMES = False
 
 FONT_PATH = 'App/fonts/EpilepsySans.ttf'
-FONT = pygame.font.Font(FONT_PATH, 26)
-BIG_FONT = pygame.font.Font(FONT_PATH, 42)
+FONT = assets.font(FONT_PATH, 26)
+BIG_FONT = assets.font(FONT_PATH, 42)
+SMALL_FONT = assets.font(FONT_PATH, 16)
 FONT_COLOR = pygame.Color('white')
 
 BACKGROUND_COLOR = (4, 0, 20)
+# Перерисовывать только изменившиеся области экрана
+DIRTY_RENDERING = True
 BOTTOM_LINE_COLOR = (0, 102, 255)
 
 BUTTON_HEIGHT = 50
 BUTTON_COLOR = (117, 102, 179)
 BUTTON_HOVER_COLOR = (143, 130, 196)
 
+# Меню спит в ожидании событий и перерисовывается только при изменениях;
+# шарики и лиса на стартовом экране двигаются с такой частотой
+MENU_ANIMATION_FPS = 60
+# Сколько миллисекунд спит меню без анимации, если событий нет
+MENU_IDLE_TIMEOUT = 1000
+# Печатать загрузку процессора в меню раз в MENU_CPU_INTERVAL секунд
+SHOW_MENU_CPU = False
+MENU_CPU_INTERVAL = 5
+
 NEW_GAME_SETTINGS = {'score': 0, 'last_level': 1}
 
-DATA_FOLDER = 'Data'
 SECRET_KEY_PATH = 'Data/secret.key'
 GAME_SAVE_PATH = 'Data/game_save.data'
 
-MUSIC_VOLUME = 0.5
-
-MAIN_THEME_SOUND = 'App/sounds/main_theme.mp3'
-
-HIT_SOUND = pygame.mixer.Sound("App/sounds/hit.wav")
-DESTRUCTION_SOUND = pygame.mixer.Sound("App/sounds/destruction.wav")
-CLICK_SOUND = pygame.mixer.Sound("App/sounds/click.wav")
-REBOUND_SOUND = pygame.mixer.Sound("App/sounds/rebound.wav")
-GAME_OVER_SOUND = pygame.mixer.Sound("App/sounds/game_over.mp3")
-WIN_SOUND = pygame.mixer.Sound("App/sounds/win.mp3")
-SHOOT_SOUND = pygame.mixer.Sound("App/sounds/shoot.wav")
-CONTINUE_SOUND = pygame.mixer.Sound("App/sounds/continue.wav")
-ON_LINE_SOUND = pygame.mixer.Sound("App/sounds/on_line.wav")
-# ============ #
+# Каждая партия записывается, чтобы её можно было повторить: replay.py
+RECORD_REPLAYS = True
+REPLAY_FOLDER = 'Data/replays'
 
+# Профилировщик кадров: F3 — оверлей, F4 — сохранить трассу для
+# chrome://tracing или Perfetto
+PROFILER_HISTORY = 600
+PROFILER_OVERLAY_REFRESH = 15
+TRACE_FOLDER = 'Data/traces'
 
-@dataclass
-class Point:
-    x: Union[int, float]
-    y: Union[int, float]
+MUSIC_VOLUME = 0.5
 
+# Каналы микшера; первые SOUND_RESERVED_CHANNELS — для звуков интерфейса
+SOUND_CHANNELS = 16
+SOUND_RESERVED_CHANNELS = 2
+# Сколько голосов одного звука может звучать одновременно
+SOUND_VOICES = 2
+# Громкость одиночного звука и прибавка за каждое удвоение повторов в
+# кадре: слитые повторы звучат громче, пока при шести и больше не
+# упрутся в 1.0. Звуки интерфейса и конца уровня играют на полной
+# громкости
+SOUND_VOLUME = 0.6
+SOUND_STACK_GAIN = 0.25
 
-@dataclass
-class GameCodes:
-    win: int = 1
-    game_over: int = 2
-    play: int = 3
-    main_menu: int = 4
-    again: int = 5
-    exit: int = -1
+MAIN_THEME_SOUND = 'App/sounds/main_theme.mp3'
 
+HIT_SOUND = assets.sound('App/sounds/hit.wav')
+DESTRUCTION_SOUND = assets.sound('App/sounds/destruction.wav')
+CLICK_SOUND = assets.sound('App/sounds/click.wav')
+REBOUND_SOUND = assets.sound('App/sounds/rebound.wav')
+GAME_OVER_SOUND = assets.sound('App/sounds/game_over.mp3')
+WIN_SOUND = assets.sound('App/sounds/win.mp3')
+SHOOT_SOUND = assets.sound('App/sounds/shoot.wav')
+CONTINUE_SOUND = assets.sound('App/sounds/continue.wav')
+ON_LINE_SOUND = assets.sound('App/sounds/on_line.wav')
+# ============ #
 
-if not path.exists(DATA_FOLDER):
-    makedirs(DATA_FOLDER)
 
-if not path.exists(SECRET_KEY_PATH):
-    key = Fernet.generate_key()
-    with open(SECRET_KEY_PATH, 'wb') as f:
-        f.write(key)
-else:
-    with open(SECRET_KEY_PATH, 'rb') as f:
-        key = f.read()
+# Звуки и сохранение загружаются в фоне, пока создаётся окно
+assets.mark('шрифты')
+assets.music(MAIN_THEME_SOUND, MUSIC_VOLUME)
+assets.start_preloading()
 
-fernet = Fernet(key)
+saves = SaveManager(GAME_SAVE_PATH, SECRET_KEY_PATH, NEW_GAME_SETTINGS)
+saves.start()
+# Пока main() не дождался сохранения, партии идут с нового счёта: так
+# GameMap работает и без главного цикла, например в бенчмарке и тестах
+game_save = NEW_GAME_SETTINGS.copy()
 
-if path.exists(GAME_SAVE_PATH):
-    with open(GAME_SAVE_PATH, 'rb') as f:
-        game_save = json.loads(fernet.decrypt(f.read()))
-else:
-    game_save = NEW_GAME_SETTINGS.copy()
+audio = SoundDispatcher(
+    SOUND_CHANNELS,
+    SOUND_RESERVED_CHANNELS,
+    SOUND_VOICES,
+    SOUND_VOLUME,
+    SOUND_STACK_GAIN,
+)
 
 clock = pygame.time.Clock()
 fps = DEFAULT_FPS
 
 screen = pygame.display.set_mode(
-    (LEVEL_WIDTH * BLOCK_SIZE, LEVEL_HEIGHT * BLOCK_SIZE + 150)
+    (VIEW_WIDTH * BLOCK_SIZE, VIEW_HEIGHT * BLOCK_SIZE + HUD_HEIGHT)
 )
-screen_rect = (0, 0, screen.get_width(), screen.get_height())
-
-pygame.mixer.music.load(MAIN_THEME_SOUND)
-pygame.mixer.music.play(-1)
-pygame.mixer.music.set_volume(MUSIC_VOLUME)
+assets.mark('окно')
 
 
 class TextRender:
     def __init__(self, screen: pygame.surface.Surface) -> None:
         self.screen = screen
 
-    def bottom_left(self, text: str, font: pygame.font.Font = FONT) -> None:
+    def bottom_left(
+        self, text: str, font: pygame.font.Font = FONT
+    ) -> pygame.Rect:
         text_surface = font.render(text, False, FONT_COLOR)
-        self.screen.blit(
+        return self.screen.blit(
             text_surface,
             (10, self.screen.get_height() - 10 - text_surface.get_height()),
         )
 
-    def bottom_right(self, text: str, font: pygame.font.Font = FONT) -> None:
+    def bottom_right(
+        self, text: str, font: pygame.font.Font = FONT
+    ) -> pygame.Rect:
         text_surface = font.render(text, False, FONT_COLOR)
-        self.screen.blit(
+        return self.screen.blit(
             text_surface,
             (
                 self.screen.get_width() - 10 - text_surface.get_width(),
-                screen.get_height() - 10 - text_surface.get_height(),
+                self.screen.get_height() - 10 - text_surface.get_height(),
             ),
         )
 
     def center(
         self, text: str, pos_y: int, font: pygame.font.Font = FONT
-    ) -> None:
+    ) -> pygame.Rect:
         text_surface = font.render(text, False, FONT_COLOR)
-        self.screen.blit(
+        return self.screen.blit(
             text_surface,
             (
                 (self.screen.get_width() - text_surface.get_width()) / 2,
@@ -151,26 +229,275 @@ class TextRender:
         )
 
 
+class Camera:
+    """Видимая часть уровня: прямоугольник размером с окно.
+
+    Спрайты живут в координатах уровня, а на экран попадают со сдвигом
+    на положение камеры. Камера не выходит за края уровня; если уровень
+    меньше окна, она прижата к его левому верхнему углу.
+    """
+
+    def __init__(
+        self,
+        size: Tuple[int, int],
+        world_size: Union[Tuple[int, int], None] = None,
+    ) -> None:
+        self.rect = pygame.Rect((0, 0), size)
+        self.world = pygame.Rect((0, 0), world_size or size)
+
+    def move(self, dx: float, dy: float) -> bool:
+        """Сдвигает камеру, False — она уже упёрлась в край."""
+        old = self.rect.topleft
+        self.rect.move_ip(dx, dy)
+        self._clamp()
+
+        return self.rect.topleft != old
+
+    def look_at(self, pos_x: float, bottom: float) -> None:
+        self.rect.centerx = pos_x
+        self.rect.bottom = bottom
+        self._clamp()
+
+    def _clamp(self) -> None:
+        self.rect.x = max(
+            min(self.rect.x, self.world.width - self.rect.width), 0
+        )
+        self.rect.y = max(
+            min(self.rect.y, self.world.height - self.rect.height), 0
+        )
+
+    def to_screen(self, rect: pygame.Rect) -> pygame.Rect:
+        return rect.move(-self.rect.x, -self.rect.y)
+
+    def to_world(self, pos: Tuple[int, int]) -> Tuple[int, int]:
+        return pos[0] + self.rect.x, pos[1] + self.rect.y
+
+
+class Canvas:
+    """Экран с кешированным фоном.
+
+    Статичные спрайты запекаются в фон, остальное каждый кадр стирается
+    кусками фона и рисуется заново, а на дисплей уходят только
+    затронутые прямоугольники.
+
+    Фон хранит только то, что видит камера. Какие статичные спрайты
+    попали в прямоугольник, отвечает query: на большом уровне это
+    выборка из сетки блоков, а не перебор всех спрайтов.
+    """
+
+    def __init__(self, screen: pygame.surface.Surface) -> None:
+        self.screen = screen
+
+        self.base = pygame.Surface(screen.get_size()).convert()
+        self.background = self.base.copy()
+        self.static = pygame.sprite.Group()
+        self.camera = Camera(screen.get_size())
+        self.query = self._find_static
+
+        self.drawn: List[pygame.Rect] = []
+        self.dirty: List[pygame.Rect] = []
+        # Прямоугольники как кортежи: блок, по которому за кадр попали
+        # сотни раз, пересобирается один раз
+        self.invalid: Dict[Tuple[int, int, int, int], None] = {}
+        self.full = True
+        self.stale = False
+
+    def reset(
+        self,
+        static: Iterable[pygame.sprite.Sprite] = (),
+        base: Union[pygame.surface.Surface, None] = None,
+        camera: Union[Camera, None] = None,
+        query: Union[
+            Callable[[pygame.Rect], Iterable[pygame.sprite.Sprite]], None
+        ] = None,
+    ) -> None:
+        if base is None:
+            self.base.fill(pygame.Color(BACKGROUND_COLOR))
+        else:
+            self.base.blit(base, (0, 0))
+
+        self.static = pygame.sprite.Group(*static)
+        self.camera = camera or Camera(self.screen.get_size())
+        self.query = query or self._find_static
+
+        self._rebuild(self.camera.rect)
+
+        self.drawn = []
+        self.invalid = {}
+        self.full = True
+        self.stale = False
+
+    def invalidate(self, rect: pygame.Rect) -> None:
+        # Изменения за кадром перерисуются, когда туда придёт камера
+        if self.camera.rect.colliderect(rect):
+            self.invalid[tuple(rect)] = None
+
+    def refresh(self) -> None:
+        """Пересобрать весь видимый фон, например после сдвига камеры."""
+        self.stale = True
+
+    def scroll(self, dx: float, dy: float) -> None:
+        if self.camera.move(dx, dy):
+            self.refresh()
+
+    def begin(self) -> None:
+        if self.stale:
+            self._rebuild(self.camera.rect)
+            self.stale = False
+            self.invalid = {}
+            self.full = True
+
+        invalid = [pygame.Rect(rect) for rect in self.invalid]
+        for rect in invalid:
+            self._rebuild(rect)
+
+        invalid = [self.camera.to_screen(rect) for rect in invalid]
+
+        if self.full or not DIRTY_RENDERING:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.drawn + invalid:
+                self.screen.blit(self.background, rect, rect)
+
+        self.dirty = self.drawn + invalid
+        self.drawn = []
+        self.invalid = {}
+
+    def add(self, rect: Union[pygame.Rect, List[pygame.Rect], None]) -> None:
+        if isinstance(rect, list):
+            self.drawn.extend(rect)
+        elif rect:
+            self.drawn.append(rect)
+
+    def draw(self, sprites: Iterable[pygame.sprite.Sprite]) -> None:
+        """Рисует видимые спрайты, кроме статичных: они уже есть на фоне."""
+        view = self.camera.rect
+
+        self.add(
+            self.screen.blits(
+                [
+                    (sprite.image, sprite.rect.move(-view.x, -view.y))
+                    for sprite in sprites
+                    if sprite not in self.static
+                    and view.colliderect(sprite.rect)
+                ]
+            )
+        )
+
+    def draw_batch(
+        self,
+        image: pygame.surface.Surface,
+        positions: Iterable[Tuple[int, int]],
+    ) -> None:
+        """Рисует одну картинку во многих местах одним вызовом blits.
+
+        Так рисуются шарики: их бывает несколько тысяч за ход.
+        """
+        view = self.camera.rect
+        width, height = image.get_size()
+        left, top = view.left - width, view.top - height
+
+        blits = [
+            (image, (x - view.x, y - view.y))
+            for x, y in positions
+            if left < x < view.right and top < y < view.bottom
+        ]
+
+        if len(blits) > BATCH_DIRTY_LIMIT:
+            self.screen.blits(blits, doreturn=False)
+            self.add(self.screen.get_rect())
+        else:
+            self.add(self.screen.blits(blits))
+
+    def flip(self) -> None:
+        if self.full or not DIRTY_RENDERING:
+            pygame.display.flip()
+            self.full = False
+        else:
+            pygame.display.update(self.dirty + self.drawn)
+
+    def _find_static(self, rect: pygame.Rect) -> List[pygame.sprite.Sprite]:
+        return [
+            sprite for sprite in self.static if sprite.rect.colliderect(rect)
+        ]
+
+    def _rebuild(self, rect: pygame.Rect) -> None:
+        """Перерисовывает фон под rect, заданным в координатах уровня."""
+        screen_rect = self.camera.to_screen(rect)
+
+        self.background.set_clip(screen_rect)
+        self.background.blit(self.base, screen_rect, screen_rect)
+
+        for sprite in self.query(rect):
+            self.background.blit(
+                sprite.image, self.camera.to_screen(sprite.rect)
+            )
+
+        self.background.set_clip(None)
+
+
 class GameMap:
-    def __init__(self, level: List[List[str]], ball_count: int) -> None:
+    def __init__(
+        self, level: List[List[str]], ball_count: int, swarm: bool = False
+    ) -> None:
         self.width = len(level[0])
         self.height = len(level)
 
+        # Сетка хранит блоки по строкам уровня. После хода блоки не
+        # двигаются: растёт row_offset, и строка y сетки оказывается на
+        # экране в строке y + row_offset
         self.map = [[None] * self.width for _ in range(self.height)]
+        self.row_offset = 0
+        self.row_blocks = [0] * self.height
+        self.lowest_row = -1
+
         self.ball_count = ball_count
+        self.swarm = swarm
+        self.spawn_ticks = SWARM_SPAWN_TICKS if swarm else BALL_SPAWN_TICKS
 
         self.score = 0
+        self.turns = 0
+        self.turn_start_score = 0
+        self.best_shot = None
+
+        # Размеры уровня в пикселях; окно может показывать только часть
+        self.pixel_width = self.width * BLOCK_SIZE
+        self.pixel_height = self.height * BLOCK_SIZE + HUD_HEIGHT
         self.bottom_line = BottomLine(
-            self.height * BLOCK_SIZE + BLOCK_SIZE // 2
+            get_line_top(self.height), self.pixel_width
         )
 
         self.is_shoot = False
-        self.previous_time = pygame.time.get_ticks()
+        self.shot_angle = None
+        self.ticks = 0
+        self.next_spawn = 0
+        # Сколько шариков хода вылетело и сколько уже собрано на линии
+        self.spawned = 0
+        self.done = 0
+
+        self.speed_mode = 0
+        self.lag = 0
+        self.elapsed = 0
 
         self.ball_stop_point = None
+        self.sight_paths = {}
+
+        # Подписи рендерятся заново, только когда меняется число
+        self.score_label = Label(
+            FONT,
+            FONT_COLOR,
+            'bottomleft',
+            (10, screen.get_height() - 10),
+        )
+        self.balls_label = Label(
+            FONT,
+            FONT_COLOR,
+            'bottomright',
+            (screen.get_width() - 10, screen.get_height() - 10),
+        )
 
         self.departure_point = pygame.math.Vector2(
-            screen.get_width() / 2, self.bottom_line.rect.top - BALL_RADIUS
+            self.pixel_width / 2, self.bottom_line.rect.top - BALL_RADIUS
         )
 
         for y in range(self.height):
@@ -179,6 +506,92 @@ class GameMap:
 
                 if symbol.isdigit():
                     self.map[y][x] = Block(self, x, y, int(symbol))
+                    self.row_blocks[y] += 1
+                    self.lowest_row = y
+
+    def find_block(self, rect: pygame.Rect) -> Union['Block', None]:
+        return find_in_grid(self.map, rect, self.row_offset)
+
+    def remove_block(self, block: 'Block') -> None:
+        row = block.pos_y
+
+        if self.map[row][block.pos_x] is block:
+            self.map[row][block.pos_x] = None
+
+        self.row_blocks[row] -= 1
+
+        # Нижняя строка только поднимается, поэтому за всю партию поиск
+        # проходит каждую строку не больше одного раза
+        while self.lowest_row >= 0 and not self.row_blocks[self.lowest_row]:
+            self.lowest_row -= 1
+
+    def get_cells(self) -> List[List[Union[int, None]]]:
+        """Прочность блоков по строкам экрана, как в Board."""
+        shown = max(self.height - self.row_offset, 0)
+
+        return [
+            [None] * self.width for _ in range(self.height - shown)
+        ] + [
+            [None if block is None else block.number for block in row]
+            for row in self.map[:shown]
+        ]
+
+    def find_static(self, rect: pygame.Rect) -> List[pygame.sprite.Sprite]:
+        """Блоки и нижняя линия под rect: выборка из сетки для Canvas."""
+        left = max(rect.left // BLOCK_SIZE, 0)
+        right = min((rect.right - 1) // BLOCK_SIZE, self.width - 1)
+        top = max(rect.top // BLOCK_SIZE - self.row_offset, 0)
+        bottom = min(
+            (rect.bottom - 1) // BLOCK_SIZE - self.row_offset, self.height - 1
+        )
+
+        # Отрицательный конец среза считался бы с другого края сетки:
+        # rect над всеми строками уровня не задевает ни одного блока
+        if bottom < top or right < left:
+            sprites = []
+        else:
+            sprites = [
+                block
+                for row in self.map[top:bottom + 1]
+                for block in row[left:right + 1]
+                if block is not None
+            ]
+
+        if self.bottom_line.rect.colliderect(rect):
+            sprites.append(self.bottom_line)
+
+        return sprites
+
+    def get_camera(self) -> Camera:
+        """Камера размером с окно, которая смотрит на точку вылета."""
+        camera = Camera(
+            screen.get_size(), (self.pixel_width, self.pixel_height)
+        )
+        camera.look_at(self.departure_point.x, self.pixel_height)
+
+        return camera
+
+    def board_changed(self) -> None:
+        self.sight_paths.clear()
+
+    def get_sight_path(self, angle: float) -> List[Tuple[float, float]]:
+        key = round(angle / AIM_ANGLE_STEP)
+
+        if key not in self.sight_paths:
+            self.sight_paths[key] = self._trace_sight(key * AIM_ANGLE_STEP)
+
+        return self.sight_paths[key]
+
+    def _trace_sight(self, angle: float) -> List[Tuple[float, float]]:
+        x = self.departure_point.x - BALL_RADIUS
+        y = self.departure_point.y
+        speed = get_shot_speed(angle)
+
+        if not AIM_PREVIEW:
+            length = self.pixel_height / speed.length()
+            return [(x, y), (x + speed.x * length, y + speed.y * length)]
+
+        return trace_path(self.to_board(), angle, AIM_PREVIEW_BOUNCES)
 
     def get_score(self) -> int:
         return self.score
@@ -194,84 +607,148 @@ class GameMap:
     ) -> None:
         self.ball_stop_point = new_point
 
-    def shoot(self) -> None:
-        if all(
-            map(
-                lambda x: x.speed == pygame.math.Vector2(0),
-                balls_group.sprites(),
-            )
-        ):
-            self.is_shoot = pygame.mouse.get_pos()
-
-    def update(self) -> None:
-        global fps, game_save
+    def to_board(self) -> Board:
+        return Board(
+            self.get_cells(),
+            self.ball_count,
+            self.departure_point.x,
+            self.score,
+            self.swarm,
+        )
 
-        text_render.bottom_left(f'Текущий счёт: {self.get_score()}')
-        text_render.bottom_right(
-            f'x{self.ball_count - len(balls_group.sprites())}'
+    def get_aim(self, target: Tuple[int, int]) -> float:
+        return get_aim_angle(
+            self.departure_point, target, self.bottom_line.rect.top
         )
 
+    def shoot(self, angle: float) -> bool:
+        """Начинает ход, False — предыдущий ещё не закончен."""
+        if self.is_shoot:
+            return False
+
+        self.is_shoot = True
+        self.shot_angle = angle
+        self.ticks = 0
+        self.next_spawn = 0
+        self.lag = 0
+
+        return True
+
+    def speed_up(self) -> None:
+        self.speed_mode = min(self.speed_mode + 1, len(SPEED_MODES) - 1)
+
+    def slow_down(self) -> None:
+        self.speed_mode = max(self.speed_mode - 1, 0)
+
+    def update(self, elapsed: int) -> Union[None, int]:
+        self.elapsed += elapsed
+
+        self.score_label.set(f'Текущий счёт: {self.get_score()}')
+        self.balls_label.set(f'x{self.ball_count - self.spawned}')
+        canvas.add(self.score_label.draw(screen))
+        canvas.add(self.balls_label.draw(screen))
+
         if not self.is_shoot:
-            draw_sight_line(self)
+            canvas.add(draw_sight_line(self))
 
-        if self.is_shoot and len(balls_group.sprites()) < self.ball_count:
-            now = pygame.time.get_ticks()
-            if now - self.previous_time > DEFAULT_FPS * 100 / fps:
-                mouse = tuple(map(lambda x: x + BALL_RADIUS, self.is_shoot))
+        if not self.is_shoot:
+            return None
+
+        speed = SPEED_MODES[self.speed_mode]
+
+        if speed is None:
+            while self.is_shoot:
+                code = self.tick()
+                if code:
+                    return code
+
+            return None
 
-                if mouse[1] > self.bottom_line.rect.top - 20:
-                    mouse = (mouse[0], self.bottom_line.rect.top - 20)
-                distance = mouse - self.departure_point
+        self.lag = min(
+            self.lag + elapsed * speed * TICK_RATE, MAX_LAG * speed * TICK_RATE
+        )
+        ticks, self.lag = divmod(self.lag, 1000)
+        deadline = perf_counter() + PHYSICS_BUDGET / 1000
+
+        for _ in range(ticks):
+            code = self.tick()
+            if code or not self.is_shoot:
+                return code
+
+            if perf_counter() > deadline:
+                self.lag = 0
+                return None
 
+    def tick(self) -> Union[None, int]:
+        if self.spawned < self.ball_count:
+            if self.ticks >= self.next_spawn:
                 position = pygame.math.Vector2(
                     self.departure_point.x - BALL_RADIUS,
                     self.departure_point.y,
                 )
-                speed = distance.normalize() * BALL_SPEED
+                speed = get_shot_speed(self.shot_angle)
 
-                SHOOT_SOUND.play()
+                audio.play(SHOOT_SOUND)
                 Ball(self, position, speed)
-                self.previous_time = now
+                self.spawned += 1
+                self.next_spawn = self.ticks + self.spawn_ticks
 
-        if self.is_shoot and all(
-            map(
-                lambda ball: ball.speed == pygame.math.Vector2(0)
-                and ball.rect.centerx == self.ball_stop_point.x,
-                balls_group.sprites(),
-            )
-        ):
-            if len(blocks_group) == 0:
-                game_save['score'] += self.score
-                game_save['last_level'] += 1
-                fps = DEFAULT_FPS
-                return GameCodes.win
-
-            CONTINUE_SOUND.play()
-            
-            fps = DEFAULT_FPS
-            self.is_shoot = False
-
-            clear_sprites(balls_group)
-            self.set_departure_point(
-                pygame.math.Vector2(
-                    self.ball_stop_point.x, self.ball_stop_point.y
-                )
+        if self.done == self.spawned:
+            return self.end_turn()
+
+        balls_group.update()
+        self.ticks += 1
+
+    def end_turn(self) -> Union[None, int]:
+        self.turns += 1
+
+        turn_score = self.score - self.turn_start_score
+        self.turn_start_score = self.score
+
+        if self.best_shot is None or turn_score > self.best_shot['score']:
+            self.best_shot = {'angle': self.shot_angle, 'score': turn_score}
+
+        if len(blocks_group) == 0:
+            game_save['score'] += self.score
+            game_save['last_level'] += 1
+            return GameCodes.win
+
+        audio.play(CONTINUE_SOUND, important=True)
+
+        self.speed_mode = 0
+        self.is_shoot = False
+
+        clear_sprites(balls_group)
+        self.spawned = 0
+        self.done = 0
+        self.set_departure_point(
+            pygame.math.Vector2(
+                self.ball_stop_point.x, self.ball_stop_point.y
             )
-            self.set_ball_stop_point()
+        )
+        self.set_ball_stop_point()
 
-            for block in blocks_group.sprites():
-                block.move()
+        # Все блоки опускаются на строку, поэтому видимый фон собирается
+        # заново
+        self.row_offset += 1
+        canvas.refresh()
+        self.board_changed()
 
-            if pygame.sprite.spritecollideany(self.bottom_line, blocks_group):
-                return GameCodes.game_over
+        if self.lowest_row + self.row_offset >= self.height:
+            return GameCodes.game_over
 
 
 class Block(pygame.sprite.Sprite):
+    """Блок в клетке (pos_x, pos_y) сетки уровня.
+
+    Положение на экране зависит от game_map.row_offset, поэтому rect и
+    стороны пересчитываются при первом обращении после хода.
+    """
+
     def __init__(
         self, game_map: GameMap, pos_x: int, pos_y: int, number: int
     ) -> None:
         super().__init__(blocks_group, all_sprites)
-        self.rect: pygame.Rect
 
         self.game_map = game_map
 
@@ -279,53 +756,55 @@ class Block(pygame.sprite.Sprite):
         self.pos_y = pos_y
         self.number = number
 
-        self._update()
+        self.row_offset = None
+        self._rect = None
+        self._sides = None
 
-    def move(self) -> None:
-        self.pos_y += 1
         self._update()
 
-    def deal_damage(self, damage: int) -> None:
-        self.number -= damage
-        self.game_map.change_score(damage * 2)
+    @property
+    def rect(self) -> pygame.Rect:
+        if self.row_offset != self.game_map.row_offset:
+            self.row_offset = self.game_map.row_offset
+            self._rect = pygame.Rect(
+                BLOCK_SIZE * self.pos_x,
+                BLOCK_SIZE * (self.pos_y + self.row_offset),
+                BLOCK_SIZE,
+                BLOCK_SIZE,
+            )
+            self._sides = None
 
-        if self.number <= BLOCK_KILL_NUMBER:
-            DESTRUCTION_SOUND.play()
-            self.game_map.change_score(damage * 10)
+        return self._rect
 
-            self.kill()
-            create_particles(self.rect.center)
+    @property
+    def sides(self) -> Dict[str, pygame.Rect]:
+        rect = self.rect
+        if self._sides is None:
+            self._sides = get_block_sides(rect)
 
-        self._update()
+        return self._sides
 
-    def _update(self) -> None:
-        self.image = get_block_image(self.number)
-        textsurface = FONT.render(str(self.number), True, FONT_COLOR)
+    def kill(self) -> None:
+        self.game_map.remove_block(self)
+        self.game_map.board_changed()
+        canvas.invalidate(self.rect)
+        super().kill()
 
-        textrect = textsurface.get_rect(center=self.image.get_rect().center)
-        self.image.blit(textsurface, textrect)
+    def deal_damage(self, damage: int) -> None:
+        self.number, score, killed = damage_block(self.number, damage)
+        self.game_map.change_score(score)
 
-        self.rect = pygame.Rect(
-            BLOCK_SIZE * self.pos_x,
-            BLOCK_SIZE * self.pos_y,
-            BLOCK_SIZE,
-            BLOCK_SIZE,
-        )
+        if killed:
+            audio.play(DESTRUCTION_SOUND)
 
-        self.sides = dict(
-            left=pygame.Rect(
-                self.rect.left - 1, self.rect.top, 1, self.rect.height
-            ),
-            right=pygame.Rect(
-                self.rect.right, self.rect.top, 1, self.rect.height
-            ),
-            top=pygame.Rect(
-                self.rect.left, self.rect.top - 1, self.rect.width, 1
-            ),
-            bottom=pygame.Rect(
-                self.rect.left, self.rect.bottom, self.rect.width, 1
-            ),
-        )
+            self.kill()
+            create_particles(self.rect.center)
+        else:
+            self._update()
+
+    def _update(self) -> None:
+        self.image = get_block_tile(self.number)
+        canvas.invalidate(self.rect)
 
 
 class Ball(pygame.sprite.Sprite):
@@ -346,15 +825,12 @@ class Ball(pygame.sprite.Sprite):
 
         self.damage = damage
 
-        self.image = pygame.Surface(
-            (2 * BALL_RADIUS, 2 * BALL_RADIUS), pygame.SRCALPHA, 32
-        )
-        pygame.draw.circle(
-            self.image,
-            pygame.Color(BALL_COLOR),
-            (BALL_RADIUS, BALL_RADIUS),
-            BALL_RADIUS,
-        )
+        self.state = BallStates.flying
+        self.gather_from = 0
+        self.gather_tick = 0
+        self.gather_ticks = 0
+
+        self.image = get_ball_image()
         self.rect = pygame.Rect(
             self.position.x - BALL_RADIUS,
             self.position.y - BALL_RADIUS,
@@ -369,92 +845,62 @@ class Ball(pygame.sprite.Sprite):
         self.rect.centery = self.position.y
 
     def update(self) -> None:
-        if self.speed != pygame.math.Vector2(0):
-            self.move()
+        if self.state == BallStates.flying:
+            self.fly()
 
-        if self.rect.bottom >= self.game_map.bottom_line.rect.top:
-            if self.speed != pygame.math.Vector2(0):
-                ON_LINE_SOUND.play()
+        if self.state == BallStates.landed:
+            self.gather_from = self.rect.centerx
+            self.gather_ticks = get_gather_ticks(
+                self.game_map.ball_stop_point.x - self.rect.centerx
+            )
 
-                self.speed = pygame.math.Vector2(0)
-                self.rect.bottom = self.game_map.bottom_line.rect.top
+            if self.gather_ticks:
+                self.state = BallStates.gathering
+            else:
+                self.finish()
+
+        if self.state == BallStates.gathering:
+            self.gather_tick += 1
+            self.rect.centerx = get_gather_x(
+                self.gather_from,
+                self.game_map.ball_stop_point.x,
+                self.gather_tick,
+                self.gather_ticks,
+            )
 
-                if self.game_map.ball_stop_point is None:
-                    self.game_map.set_ball_stop_point(Point(*self.rect.center))
+            if self.gather_tick == self.gather_ticks:
+                self.finish()
 
-            if self.rect.centerx != self.game_map.ball_stop_point.x:
-                if self.rect.centerx < self.game_map.ball_stop_point.x:
-                    self.rect.x += 1
-                else:
-                    self.rect.x -= 1
+    def finish(self) -> None:
+        self.state = BallStates.done
+        self.game_map.done += 1
 
-            return None
+    def fly(self) -> None:
+        self.move()
 
-        if self.rect.left <= 0 or self.rect.right >= screen.get_width():
-            self.speed.x = -self.speed.x
+        if self.rect.bottom >= self.game_map.bottom_line.rect.top:
+            audio.play(ON_LINE_SOUND)
 
-        if self.rect.top <= 0:
-            self.speed.y = -self.speed.y
+            self.state = BallStates.landed
+            self.speed = pygame.math.Vector2(0)
+            self.rect.bottom = self.game_map.bottom_line.rect.top
 
-        block = pygame.sprite.spritecollideany(self, blocks_group)
+            if self.game_map.ball_stop_point is None:
+                self.game_map.set_ball_stop_point(Point(*self.rect.center))
 
-        if not block:
             return None
 
-        block.deal_damage(self.damage)
-        HIT_SOUND.play()
+        bounce_off_walls(self.rect, self.speed, self.game_map.pixel_width)
 
-        collisions = set(
-            side
-            for side, rect in block.sides.items()
-            if self.rect.colliderect(rect)
-        )
+        block = self.game_map.find_block(self.rect)
 
-        if (
-            {'left', 'right'} & collisions
-            and 'bottom' in collisions
-            and self.rect.centery > block.rect.bottom
-        ):
-            if self.speed.y <= 0:
-                self.speed.y = -self.speed.y
-            else:
-                self.speed.x = -self.speed.x
-
-        elif (
-            {'left', 'right'} & collisions
-            and 'top' in collisions
-            and self.rect.centery < block.rect.top
-        ):
-            if self.speed.y >= 0:
-                self.speed.y = -self.speed.y
-            else:
-                self.speed.x = -self.speed.x
-
-        elif (
-            {'top', 'bottom'} & collisions
-            and 'left' in collisions
-            and self.rect.centerx < block.rect.left
-        ):
-            if self.speed.x >= 0:
-                self.speed.x = -self.speed.x
-            else:
-                self.speed.y = -self.speed.y
-
-        elif (
-            {'top', 'bottom'} & collisions
-            and 'right' in collisions
-            and self.rect.centery > block.rect.right
-        ):
-            if self.speed.x <= 0:
-                self.speed.x = -self.speed.x
-            else:
-                self.speed.y = -self.speed.y
+        if not block:
+            return None
 
-        elif {'top', 'bottom'} & collisions:
-            self.speed.y = -self.speed.y
+        block.deal_damage(self.damage)
+        audio.play(HIT_SOUND)
 
-        else:
-            self.speed.x = -self.speed.x
+        bounce_off_block(self.rect, self.speed, block.rect, block.sides)
 
 
 class SimpleBall(pygame.sprite.Sprite):
@@ -462,22 +908,16 @@ class SimpleBall(pygame.sprite.Sprite):
         super().__init__(balls_group, all_sprites)
 
         self.position = pygame.math.Vector2(
-            randint(10, screen.get_width() - 10),
-            randint(10, screen.get_height() - 10),
+            rng.randint(10, screen.get_width() - 10),
+            rng.randint(10, screen.get_height() - 10),
         )
+        # Скорость задана за кадр при DEFAULT_FPS, а шарик двигается на
+        # каждом тике анимации меню
         self.speed = pygame.math.Vector2(
-            randint(20, 100) / 100, randint(20, 100) / 100
-        )
+            rng.randint(20, 100) / 100, rng.randint(20, 100) / 100
+        ) * (DEFAULT_FPS / MENU_ANIMATION_FPS)
 
-        self.image = pygame.Surface(
-            (2 * BALL_RADIUS, 2 * BALL_RADIUS), pygame.SRCALPHA, 32
-        )
-        pygame.draw.circle(
-            self.image,
-            pygame.Color(BALL_COLOR),
-            (BALL_RADIUS, BALL_RADIUS),
-            BALL_RADIUS,
-        )
+        self.image = get_ball_image()
         self.rect = pygame.Rect(
             self.position.x - BALL_RADIUS,
             self.position.y - BALL_RADIUS,
@@ -499,11 +939,11 @@ class SimpleBall(pygame.sprite.Sprite):
 
 
 class BottomLine(pygame.sprite.Sprite):
-    def __init__(self, pos_y: int) -> None:
+    def __init__(self, pos_y: int, width: int) -> None:
         super().__init__(all_sprites)
         self.rect: pygame.Rect
 
-        self.image = pygame.Surface([screen.get_width(), 2])
+        self.image = pygame.Surface([width, 2])
         pygame.draw.rect(
             self.image,
             BOTTOM_LINE_COLOR,
@@ -514,50 +954,6 @@ class BottomLine(pygame.sprite.Sprite):
         )
 
 
-class Button(pygame.sprite.Sprite):
-    def __init__(self, pos_y: Tuple[int, int], text: str, code: int):
-        super().__init__(buttons_group, all_sprites)
-
-        self.code = code
-        self.text = text
-
-        self.image = pygame.Surface(
-            (screen.get_width() / 3 * 2, BUTTON_HEIGHT)
-        )
-
-        self.rect = pygame.Rect(
-            (screen.get_width() - self.image.get_width()) / 2,
-            pos_y,
-            self.image.get_width(),
-            self.image.get_height(),
-        )
-
-        self.draw(BUTTON_COLOR)
-
-    def draw(self, button_color):
-        pygame.draw.rect(
-            self.image,
-            button_color,
-            pygame.Rect(0, 0, self.image.get_width(), self.image.get_height()),
-        )
-
-        textsurface = FONT.render(self.text, True, FONT_COLOR)
-        textrect = textsurface.get_rect(center=self.image.get_rect().center)
-
-        self.image.blit(textsurface, textrect)
-
-    def update(self) -> None:
-        if self.rect.collidepoint(*pygame.mouse.get_pos()):
-            self.draw(BUTTON_HOVER_COLOR)
-        else:
-            self.draw(BUTTON_COLOR)
-
-    def check_click(self) -> Union[None, int]:
-        if self.rect.collidepoint(*pygame.mouse.get_pos()):
-            CLICK_SOUND.play()
-            return self.code
-
-
 class AnimatedSprite(pygame.sprite.Sprite):
     def __init__(self, sheet, columns, rows, center_x, bottom_y):
         super().__init__(all_sprites)
@@ -591,45 +987,101 @@ class AnimatedSprite(pygame.sprite.Sprite):
             self.image = self.frames[self.cur_frame]
 
 
-class Particle(pygame.sprite.Sprite):
-    def __init__(
+class ParticleSystem:
+    """Пул частиц: состояние в массивах, общий запас на PARTICLES_LIMIT.
+
+    Когда запас кончается, новые частицы занимают места самых старых.
+    """
+
+    def __init__(self, capacity: int = PARTICLES_LIMIT) -> None:
+        self.capacity = capacity
+
+        self.x = array('d', [0]) * capacity
+        self.y = array('d', [0]) * capacity
+        self.dx = array('d', [0]) * capacity
+        self.dy = array('d', [0]) * capacity
+        self.size = array('i', [0]) * capacity
+        self.alive = bytearray(capacity)
+        self.images: List[Union[pygame.Surface, None]] = [None] * capacity
+
+        self.next = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def emit(
         self,
         pos: Tuple[int, int],
         dx: int,
         dy: int,
         color: Tuple[int, int, int],
     ) -> None:
-        super().__init__(all_sprites)
+        i = self.next
+        self.next = (i + 1) % self.capacity
 
-        image = pygame.Surface((BLOCK_SIZE // 2, BLOCK_SIZE // 2))
-        pygame.draw.rect(
-            image,
-            pygame.Color(color),
-            pygame.Rect(0, 0, BLOCK_SIZE, BLOCK_SIZE),
-        )
-        size = choice((5, 10, 20))
-        self.image = pygame.transform.scale(image, (size, size))
+        if not self.alive[i]:
+            self.alive[i] = 1
+            self.count += 1
 
-        self.rect = self.image.get_rect()
-
-        self.velocity = [dx, dy]
-        self.rect.x, self.rect.y = pos
+        size = rng.choice(PARTICLE_SIZES)
 
-        self.gravity = GRAVITY
+        self.x[i], self.y[i] = pos
+        self.dx[i], self.dy[i] = dx, dy
+        self.size[i] = size
+        self.images[i] = get_particle_image(color, size)
 
-    def update(self) -> None:
-        self.velocity[1] += self.gravity
+    def update(self, view: pygame.Rect) -> None:
+        """Двигает частицы; вылетевшие из view больше не считаются."""
+        if not self.count:
+            return None
 
-        self.rect.x += self.velocity[0]
-        self.rect.y += self.velocity[1]
+        x, y, dy, size, alive = self.x, self.y, self.dy, self.size, self.alive
+        left, top, right, bottom = view.left, view.top, view.right, view.bottom
+
+        for i in range(self.capacity):
+            if not alive[i]:
+                continue
+
+            dy[i] += GRAVITY
+            x[i] += self.dx[i]
+            y[i] += dy[i]
+
+            if (
+                x[i] + size[i] <= left
+                or x[i] >= right
+                or y[i] + size[i] <= top
+                or y[i] >= bottom
+            ):
+                alive[i] = 0
+                self.images[i] = None
+                self.count -= 1
+
+    def draw(
+        self, surface: pygame.Surface, offset: Tuple[int, int] = (0, 0)
+    ) -> List[pygame.Rect]:
+        if not self.count:
+            return []
+
+        offset_x, offset_y = offset
+
+        return surface.blits(
+            [
+                (self.images[i], (self.x[i] - offset_x, self.y[i] - offset_y))
+                for i in range(self.capacity)
+                if self.alive[i]
+            ]
+        )
 
-        if not self.rect.colliderect(screen_rect):
-            self.kill()
+    def clear(self) -> None:
+        self.alive[:] = bytes(self.capacity)
+        self.images = [None] * self.capacity
+        self.count = 0
 
 
 class Image(pygame.sprite.Sprite):
     def __init__(self, pos_x, pos_y, image_name) -> None:
-        super().__init__(balls_group, all_sprites)
+        super().__init__(all_sprites)
 
         self.image = load_image(image_name)
         self.rect = self.image.get_rect()
@@ -639,12 +1091,31 @@ class Image(pygame.sprite.Sprite):
 
 
 def save_game_data() -> None:
-    with open(GAME_SAVE_PATH, 'wb') as f:
-        f.write(fernet.encrypt(json.dumps(game_save).encode()))
+    saves.save(game_save)
+
+
+def get_bot() -> Bot:
+    global bot
+
+    # Процессы бота запускаются только при первом включении автоигры
+    if bot is None:
+        bot = Bot()
+
+    return bot
+
+
+def close_bot() -> None:
+    global bot
+
+    if bot is not None:
+        bot.close()
+        bot = None
 
 
 def terminate() -> None:
     save_game_data()
+    saves.close()
+    close_bot()
 
     pygame.quit()
     sys.exit()
@@ -657,38 +1128,37 @@ def hsv_to_rgb(h: int, s: int, v: int) -> Tuple[int, int, int]:
 
 
 def load_image(name: str) -> pygame.surface.Surface:
-    image = pygame.image.load(f'App/img/{name}.png')
-    image = image.convert_alpha()
-
-    return image
+    return assets.image(f'App/img/{name}.png').get()
 
 
-def level_exist(number: int) -> bool:
-    return path.exists(f'App/levels/level_{number}.txt')
-
+BLOCK_PALETTE = tuple(
+    (
+        pygame.Color(hsv_to_rgb(hue, 56, 82)),
+        pygame.Color(hsv_to_rgb(hue, 56, 46)),
+    )
+    for hue in range(0, 360, BLOCK_HUE_STEP)
+)
 
-def load_level(number: Union[int, str]) -> Tuple[List[List[str]], int]:
-    file_name = f'App/levels/level_{number}.txt'
 
-    with open(file_name, 'r') as map_file:
-        lines = map_file.readlines()
-        level_map = [
-            [i for i in line.rstrip('\n').split('|')] for line in lines[:-1]
-        ]
+@lru_cache(maxsize=None)
+def get_digit_glyph(char: str) -> pygame.Surface:
+    return FONT.render(char, True, FONT_COLOR)
 
-        return level_map, int(lines[-1])
 
+@lru_cache(maxsize=len(BLOCK_PALETTE))
+def get_block_image(hue: int) -> pygame.Surface:
+    """Фон блока для оттенка hue — номера цвета в BLOCK_PALETTE."""
+    light, dark = BLOCK_PALETTE[hue]
 
-def get_block_image(number: int) -> pygame.Surface:
-    block_image = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE))
+    block_image = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE)).convert()
     pygame.draw.rect(
         block_image,
-        pygame.Color(hsv_to_rgb(number * 15 % 360, 56, 82)),
+        light,
         pygame.Rect(1, 1, BLOCK_SIZE - 2, BLOCK_SIZE - 2),
     )
     pygame.draw.rect(
         block_image,
-        pygame.Color(hsv_to_rgb(number * 15 % 360, 56, 46)),
+        dark,
         pygame.Rect(
             BLOCK_SIZE * 0.1,
             BLOCK_SIZE * 0.1,
@@ -700,12 +1170,56 @@ def get_block_image(number: int) -> pygame.Surface:
     return block_image
 
 
+@lru_cache(maxsize=BLOCK_CACHE_SIZE)
+def get_block_tile(number: int) -> pygame.Surface:
+    """Блок с числом; картинка общая для всех блоков, менять её нельзя."""
+    tile = get_block_image(number % len(BLOCK_PALETTE)).copy()
+
+    glyphs = [get_digit_glyph(char) for char in str(number)]
+    width = sum(glyph.get_width() for glyph in glyphs)
+
+    x = (BLOCK_SIZE - width) // 2
+    for glyph in glyphs:
+        tile.blit(glyph, (x, (BLOCK_SIZE - glyph.get_height()) // 2))
+        x += glyph.get_width()
+
+    return tile
+
+
+@lru_cache(maxsize=None)
+def get_ball_image() -> pygame.Surface:
+    """Картинка шарика, общая для всех шариков; менять её нельзя."""
+    image = pygame.Surface(
+        (2 * BALL_RADIUS, 2 * BALL_RADIUS), pygame.SRCALPHA, 32
+    ).convert_alpha()
+    pygame.draw.circle(
+        image,
+        pygame.Color(BALL_COLOR),
+        (BALL_RADIUS, BALL_RADIUS),
+        BALL_RADIUS,
+    )
+
+    return image
+
+
+@lru_cache(maxsize=len(PARTICLE_SIZES) * 128)
+def get_particle_image(
+    color: Tuple[int, int, int], size: int
+) -> pygame.Surface:
+    image = pygame.Surface((size, size)).convert()
+    image.fill(pygame.Color(color))
+
+    return image
+
+
 def create_particles(position: Tuple[int, int]) -> None:
     numbers = range(-5, 6)
-    color = hsv_to_rgb(randint(0, 360), 75, 75)
+    color = hsv_to_rgb(rng.randint(0, 360), 75, 75)
 
     for _ in range(PARTICLES_COUNT):
-        Particle(position, choice(numbers), choice(numbers), color)
+        particles.emit(
+            position, rng.choice(numbers), rng.choice(numbers), color
+        )
 
 
 def clear_sprites(group: pygame.sprite.Group):
@@ -713,6 +1227,33 @@ def clear_sprites(group: pygame.sprite.Group):
         sprite.kill()
 
 
+def draw_profiler_overlay(frame: int) -> pygame.Rect:
+    global profiler_overlay
+
+    # Текст перерисовывается не каждый кадр, чтобы оверлей сам не мешал
+    # замерам
+    if profiler_overlay is None or frame % PROFILER_OVERLAY_REFRESH == 0:
+        lines = [
+            SMALL_FONT.render(line, False, FONT_COLOR)
+            for line in profiler.summary()
+        ]
+
+        profiler_overlay = pygame.Surface(
+            (
+                max(line.get_width() for line in lines) + 10,
+                sum(line.get_height() for line in lines) + 10,
+            )
+        ).convert()
+        profiler_overlay.fill(BACKGROUND_COLOR)
+
+        pos_y = 5
+        for line in lines:
+            profiler_overlay.blit(line, (5, pos_y))
+            pos_y += line.get_height()
+
+    return screen.blit(profiler_overlay, (5, 5))
+
+
 def get_blackout(screen: pygame.surface.Surface) -> pygame.surface.Surface:
     blackout = pygame.Surface((screen.get_width(), screen.get_height()))
     blackout.fill('black')
@@ -722,58 +1263,147 @@ def get_blackout(screen: pygame.surface.Surface) -> pygame.surface.Surface:
 
 
 def create_buttons(
-    start_pos_y, *button_settings: Tuple[str, int]
+    start_pos_y, *button_settings: Tuple[str, int], columns: int = 1
 ) -> List[Button]:
-    buttons = []
-
-    for i in range(len(button_settings)):
-        buttons.append(
-            Button(
-                start_pos_y + BUTTON_HEIGHT * i + BUTTON_HEIGHT / 3 * i,
-                button_settings[i][0],
-                button_settings[i][1],
-            )
-        )
+    rects = grid_layout(
+        screen.get_width() / 2,
+        start_pos_y,
+        (screen.get_width() // 3 * 2, BUTTON_HEIGHT),
+        len(button_settings),
+        columns,
+        (BUTTON_HEIGHT / 3, BUTTON_HEIGHT / 3),
+    )
 
-    return buttons
+    return [
+        Button(rect, text, code, button_style, buttons_group, all_sprites)
+        for rect, (text, code) in zip(rects, button_settings)
+    ]
 
 
-def draw_sight_line(game_map: GameMap) -> None:
-    mouse = Point(*pygame.mouse.get_pos())
+def wait_events(timeout: int) -> List[pygame.event.Event]:
+    """События, а если их нет — сон до timeout миллисекунд."""
+    if timeout <= 0:
+        return pygame.event.get()
 
-    if mouse.y > game_map.bottom_line.rect.top - 20:
-        mouse.y = game_map.bottom_line.rect.top - 20
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
 
-    angle = atan2(
-        mouse.y - game_map.departure_point.y,
-        mouse.x - game_map.departure_point.x,
-    )
+    return [event] + pygame.event.get()
+
+
+def menu_loop(
+    buttons: List[Button], sprites: pygame.sprite.Group, animated: bool
+) -> int:
+    """Цикл меню до нажатия кнопки.
+
+    Кадр рисуется, только когда что-то изменилось: мышь навелась на
+    кнопку или ушла с неё, либо наступил тик анимации. Между ними
+    процесс спит в pygame.event.wait, а не крутит цикл с частотой fps.
+    """
+    tick = 1000 // MENU_ANIMATION_FPS
+    next_tick = pygame.time.get_ticks()
+    redraw = True
+    cpu.reset()
+
+    for button in buttons:
+        button.check_hover(pygame.mouse.get_pos())
+
+    while True:
+        if animated:
+            timeout = next_tick - pygame.time.get_ticks()
+        else:
+            timeout = MENU_IDLE_TIMEOUT
+
+        for event in wait_events(timeout):
+            if event.type == pygame.QUIT:
+                return GameCodes.exit
+
+            if event.type == pygame.MOUSEMOTION:
+                # Проверяются все кнопки: мышь могла уйти с одной и
+                # навестись на другую
+                if any([button.check_hover(event.pos) for button in buttons]):
+                    redraw = True
+
+            if event.type == pygame.WINDOWEXPOSED:
+                canvas.refresh()
+                redraw = True
+
+            if event.type == pygame.MOUSEBUTTONUP:
+                for button in buttons:
+                    code = button.check_click(pygame.mouse.get_pos())
+                    if code:
+                        audio.play(CLICK_SOUND, important=True)
+                        return code
+
+        now = pygame.time.get_ticks()
+        if animated and now >= next_tick:
+            # Отставшая анимация не догоняет пропущенные тики
+            next_tick = max(next_tick + tick, now)
+            sprites.update()
+            redraw = True
+
+        if redraw:
+            canvas.begin()
+            canvas.draw(sprites)
+            canvas.flip()
+            redraw = False
+
+            if assets.first_frame() and SHOW_STARTUP_TIMES:
+                print(assets.report())
+
+        audio.flush()
 
-    x = game_map.departure_point.x + screen.get_height() * cos(angle)
-    y = game_map.departure_point.y + screen.get_height() * sin(angle)
+        if cpu.update() and SHOW_MENU_CPU:
+            print(f'Меню: процессор {cpu.usage:.1%}')
 
-    pygame.draw.line(
+
+def draw_sight_line(game_map: GameMap) -> pygame.Rect:
+    camera = canvas.camera
+    angle = game_map.get_aim(camera.to_world(pygame.mouse.get_pos()))
+
+    return pygame.draw.lines(
         screen,
         FONT_COLOR,
-        (game_map.departure_point.x, game_map.departure_point.y),
-        (x, y),
+        False,
+        [
+            (x - camera.rect.x, y - camera.rect.y)
+            for x, y in game_map.get_sight_path(angle)
+        ],
         1,
     )
 
 
 text_render = TextRender(screen)
+button_style = ButtonStyle(
+    FONT, FONT_COLOR, BUTTON_COLOR, BUTTON_HOVER_COLOR
+)
+canvas = Canvas(screen)
 
 all_sprites = pygame.sprite.Group()
 blocks_group = pygame.sprite.Group()
 balls_group = pygame.sprite.Group()
 buttons_group = pygame.sprite.Group()
+particles = ParticleSystem()
+bot = None
+
+# Случайность только для украшений; её зерно пишется в запись партии
+rng = Random()
+
+profiler = FrameProfiler(PROFILER_HISTORY)
+profiler.instrument(balls_group, 'update', 'шарики')
+profiler.instrument(GameMap, 'find_block', 'столкновения')
+profiler.instrument(Block, 'deal_damage', 'столкновения')
+profiler.instrument(sys.modules[__name__], 'bounce_off_block', 'столкновения')
+profiler_overlay = None
+cpu = CpuMeter(MENU_CPU_INTERVAL)
 
 
 def start_screen() -> int:
-    for _ in range(randint(10, 30)):
+    for _ in range(rng.randint(10, 30)):
         SimpleBall()
 
-    Image(screen.get_width() / 2, 100, 'logo')
+    logo = Image(screen.get_width() / 2, 100, 'logo')
 
     AnimatedSprite(load_image('fox'), 14, 1, screen.get_width() / 2, 100)
 
@@ -797,64 +1427,197 @@ def start_screen() -> int:
             ('Выход', GameCodes.exit),
         )
 
-    while True:
-        clock.tick(fps)
-        screen.fill(pygame.Color(BACKGROUND_COLOR))
+    # Подписи рисуются на основу фона, чтобы пережить его пересборку
+    base = pygame.Surface(screen.get_size()).convert()
+    base.fill(pygame.Color(BACKGROUND_COLOR))
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return GameCodes.exit
+    base_text = TextRender(base)
+    base_text.bottom_left(f'Текущий счёт: {game_save["score"]}')
+    base_text.bottom_right(f'Lvl: {game_save["last_level"]}')
 
-            if event.type == pygame.MOUSEBUTTONUP:
-                for button in buttons:
-                    code = button.check_click()
-                    if code:
-                        return code
+    canvas.reset([logo], base=base)
+
+    return menu_loop(buttons, all_sprites, True)
 
-        text_render.bottom_left(f'Текущий счёт: {game_save["score"]}')
-        text_render.bottom_right(f'Lvl: {game_save["last_level"]}')
-        all_sprites.draw(screen)
-        all_sprites.update()
-        pygame.display.flip()
 
+def game_screen(level: int, replay: Union[Replay, None] = None) -> int:
+    """Партия на уровне; с replay выстрелы берутся из записи."""
+    seed = getrandbits(63) if replay is None else replay.seed
+    rng.seed(seed)
+    recording = Replay(level, seed)
 
-def game_screen(level: int) -> int:
-    global fps
+    shots = iter(replay.shots if replay is not None else ())
+    next_shot = next(shots, None)
 
     game_map = GameMap(*load_level(level))
+    particles.clear()
+    camera = game_map.get_camera()
+    canvas.reset(camera=camera, query=game_map.find_static)
+
+    autoplay = False
+    search = None
+
+    # Меню не сверяется с часами, и первый кадр считается от этого места,
+    # а не от последнего кадра прошлой партии
+    clock.tick()
+
+    try:
+        for frame in count():
+            elapsed = clock.tick(fps)
+            profiler.begin_frame()
+            canvas.begin()
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return GameCodes.exit
+
+                # Колесо мыши прокручивает камеру, а не стреляет
+                if (
+                    event.type == pygame.MOUSEBUTTONUP
+                    and event.button in (1, 2, 3)
+                    and replay is None
+                ):
+                    target = camera.to_world(pygame.mouse.get_pos())
+                    angle = game_map.get_aim(target)
+
+                    if game_map.shoot(angle):
+                        recording.add(game_map.elapsed, angle, target)
+
+                # Окно перекрывали: display.update по кускам не вернёт
+                # неподвижные части экрана, нужен целый кадр
+                if event.type == pygame.WINDOWEXPOSED:
+                    canvas.refresh()
+
+                if event.type == pygame.MOUSEWHEEL:
+                    canvas.scroll(
+                        event.x * CAMERA_WHEEL_STEP,
+                        -event.y * CAMERA_WHEEL_STEP,
+                    )
 
-    while True:
-        clock.tick(fps)
-        screen.fill(pygame.Color(BACKGROUND_COLOR))
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_EQUALS:
+                        game_map.speed_up()
+                    if event.key == pygame.K_MINUS:
+                        game_map.slow_down()
+                    if event.key == pygame.K_b and replay is None:
+                        autoplay = not autoplay
+                        search = None
+                        pygame.display.set_caption('PyBall')
+                    if event.key == pygame.K_F3:
+                        profiler.toggle()
+                    if event.key == pygame.K_F4 and profiler.frames:
+                        trace_file = (
+                            f'{TRACE_FOLDER}/trace_'
+                            f'{strftime("%Y%m%d_%H%M%S")}.json'
+                        )
+                        profiler.export_chrome_trace(trace_file)
+                        pygame.display.set_caption(f'PyBall — {trace_file}')
+
+            if replay is not None and not game_map.is_shoot:
+                if next_shot is None:
+                    return GameCodes.main_menu
+
+                if game_map.elapsed >= next_shot.time:
+                    game_map.shoot(next_shot.angle)
+                    next_shot = next(shots, None)
+
+            if autoplay and not game_map.is_shoot:
+                if search is None:
+                    search = get_bot().start(game_map.to_board())
+                elif search.failed():
+                    # Пул бота сломан: бот выключается, а при следующем
+                    # включении создаётся заново
+                    pygame.display.set_caption(
+                        f'PyBall — бот: ошибка {search.failed()!r}'
+                    )
+                    search = None
+                    autoplay = False
+                    close_bot()
+                elif search.done():
+                    result = search.result()
+                    search = None
+
+                    angle = result.best.angle
+                    if game_map.shoot(angle):
+                        recording.add(game_map.elapsed, angle)
+
+                    pygame.display.set_caption(
+                        f'PyBall — бот: {result.elapsed * 1000:.0f} мс, '
+                        f'{result.evaluated}/{result.total} углов'
+                    )
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return GameCodes.exit
+            keys = pygame.key.get_pressed()
+            step = CAMERA_SPEED * elapsed / 1000
+            canvas.scroll(
+                (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * step,
+                (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * step,
+            )
 
-            if event.type == pygame.MOUSEBUTTONUP:
-                game_map.shoot()
+            profiler.mark('события')
 
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_EQUALS and fps < DEFAULT_FPS * 2:
-                    fps *= 2
-                if event.key == pygame.K_MINUS and fps > DEFAULT_FPS:
-                    fps /= 2
+            code = game_map.update(elapsed)
+            profiler.mark('GameMap.update')
 
-        code = game_map.update()
-        all_sprites.update()
-        all_sprites.draw(screen)
+            particles.update(camera.rect)
+            profiler.mark('частицы')
 
-        pygame.display.flip()
+            # Блоки и нижняя линия уже на фоне, рисуются только шарики
+            canvas.draw_batch(
+                get_ball_image(),
+                [ball.rect.topleft for ball in balls_group],
+            )
+            canvas.add(particles.draw(screen, camera.rect.topleft))
+            if profiler.enabled:
+                canvas.add(draw_profiler_overlay(frame))
+            profiler.mark('отрисовка')
+
+            canvas.flip()
+            profiler.mark('display.flip')
+
+            audio.flush()
+            profiler.mark('звук')
+            profiler.end_frame()
+
+            if code:
+                if replay is None and code in (
+                    GameCodes.win,
+                    GameCodes.game_over,
+                ):
+                    record_level(
+                        game_save,
+                        level,
+                        code == GameCodes.win,
+                        game_map.score,
+                        game_map.turns,
+                        game_map.best_shot,
+                    )
+                    save_game_data()
+
+                return code
+
+    finally:
+        # Запись сохраняется и при выходе посреди партии, и при ошибке
+        if replay is None and RECORD_REPLAYS and recording.shots:
+            recording.save(
+                f'{REPLAY_FOLDER}/level_{level}_{strftime("%Y%m%d_%H%M%S")}'
+                '.replay'
+            )
 
-        if code:
-            return code
+
+def replay_screen(replay: Replay) -> int:
+    """Показывает запись партии, не трогая сохранение игрока."""
+    global game_save
+    game_save = NEW_GAME_SETTINGS.copy()
+
+    clear_sprites(all_sprites)
+    return game_screen(replay.level, replay)
 
 
 def end_screen(code: int):
     screen.blit(get_blackout(screen), (0, 0))
 
     if code == GameCodes.game_over:
-        GAME_OVER_SOUND.play()
+        audio.play(GAME_OVER_SOUND, important=True)
         buttons = [
             ('Переиграть', GameCodes.play),
             ('Главное меню', GameCodes.main_menu),
@@ -862,7 +1625,7 @@ def end_screen(code: int):
         text_render.center('Game Over', 110, BIG_FONT)
 
     elif code == GameCodes.win:
-        WIN_SOUND.play()
+        audio.play(WIN_SOUND, important=True)
         if level_exist(game_save['last_level']):
             buttons = [
                 ('Следующий уровень', GameCodes.play),
@@ -874,27 +1637,16 @@ def end_screen(code: int):
         text_render.center('Победа', 110, BIG_FONT)
 
     buttons = create_buttons(screen.get_height() / 3, *buttons)
+    canvas.reset(base=screen)
 
-    while True:
-        clock.tick(fps)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return GameCodes.exit
-
-            if event.type == pygame.MOUSEBUTTONUP:
-                for button in buttons:
-                    code = button.check_click()
-                    if code:
-                        return code
-
-        buttons_group.draw(screen)
-        buttons_group.update()
-        pygame.display.flip()
+    return menu_loop(buttons, buttons_group, False)
 
 
 def main() -> None:
     global game_save
+    game_save = saves.wait()
+    assets.mark('сохранение')
+
     code = start_screen()
 
     while True:
@@ -913,10 +1665,14 @@ def main() -> None:
             code = end_screen(code)
 
         if code == GameCodes.again:
-            game_save = NEW_GAME_SETTINGS.copy()
+            game_save = {
+                **NEW_GAME_SETTINGS,
+                'history': game_save.get('history', {}),
+            }
             save_game_data()
             clear_sprites(all_sprites)
             code = game_screen(game_save['last_level'])
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+import os
+import sys
+import json
+import argparse
+
+from math import pi, radians
+from time import perf_counter
+from random import Random
+from statistics import mean, median
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from bot import ENGINES, get_pool_context, rate_shot
+from levelpack import Level, LevelPack, read_text_levels
+from simulation import (
+    BLOCK_SIZE,
+    Board,
+    GameCodes,
+    Shot,
+    get_aim_angle,
+    simulate_shot,
+)
+
+# КОНФИГУРАЦИЯ #
+# Партия трёх стратегий занимает ядро примерно на секунду, поэтому 100
+# партий на уровень — пара минут на десяток уровней при 8 ядрах; перед
+# запуском main() печатает оценку времени
+ANALYTICS_GAMES = 100
+# Сколько партий каждой стратегии играется заранее для оценки времени
+ANALYTICS_SAMPLE = 2
+# Партии одного уровня раздаются работникам пачками такого размера
+ANALYTICS_CHUNK = 50
+ANALYTICS_SEED = 0
+
+# Под 30° и положе шарик сразу касается линии, так никто не стреляет
+MIN_ELEVATION = radians(31)
+# Разброс прицела эвристики в обе стороны
+HEURISTIC_SPREAD = radians(5)
+# Жадный игрок пробует столько случайных углов и берёт лучший; как и
+# бот, он сравнивает их EventShot — теми же правилами, но быстрее
+GREEDY_CANDIDATES = 8
+GREEDY_ENGINE = 'event'
+# ============ #
+
+
+@dataclass
+class GameResult:
+    won: bool
+    turns: int
+    score: int
+    balls: int
+
+
+def random_aim(board: Board, rng: Random) -> float:
+    """Случайный угол из тех, что может выбрать игрок."""
+    return rng.uniform(-pi + MIN_ELEVATION, -MIN_ELEVATION)
+
+
+def heuristic_aim(board: Board, rng: Random) -> float:
+    """Прицел в самый нижний блок с небольшим случайным разбросом.
+
+    Так играет новичок: бьёт в то, что ближе всего к линии.
+    """
+    for y in range(board.height - 1, -1, -1):
+        columns = [x for x, cell in enumerate(board.cells[y]) if cell]
+        if columns:
+            x = rng.choice(columns)
+            break
+    else:
+        return random_aim(board, rng)
+
+    angle = get_aim_angle(
+        board.departure,
+        (x * BLOCK_SIZE + BLOCK_SIZE // 2, y * BLOCK_SIZE + BLOCK_SIZE // 2),
+        board.line_top,
+    ) + rng.uniform(-HEURISTIC_SPREAD, HEURISTIC_SPREAD)
+
+    return min(max(angle, -pi + MIN_ELEVATION), -MIN_ELEVATION)
+
+
+def greedy_aim(board: Board, rng: Random) -> float:
+    """Лучший по оценке бота из нескольких случайных углов."""
+    angles = [random_aim(board, rng) for _ in range(GREEDY_CANDIDATES)]
+    engine = ENGINES[GREEDY_ENGINE]
+
+    return max(
+        angles,
+        key=lambda angle: rate_shot(simulate_shot(board, angle, engine)),
+    )
+
+
+STRATEGIES: Dict[str, Callable[[Board, Random], float]] = {
+    'random': random_aim,
+    'heuristic': heuristic_aim,
+    'greedy': greedy_aim,
+}
+
+
+def play_game(
+    level: Level, strategy: str, seed: int, engine: Type[Shot]
+) -> GameResult:
+    """Одна партия без экрана: ходы до победы или конца игры."""
+    board = Board.from_level(*level)
+    aim = STRATEGIES[strategy]
+    rng = Random(seed)
+
+    turns = balls = 0
+    code = None
+
+    while not code:
+        result = simulate_shot(board, aim(board, rng), engine)
+        board = result.board
+
+        turns += 1
+        balls += result.balls
+        code = result.code
+
+    return GameResult(code == GameCodes.win, turns, board.score, balls)
+
+
+def play_games(
+    level: Level, strategy: str, games: range, seed: int, engine: str
+) -> List[GameResult]:
+    return [
+        play_game(level, strategy, seed + game, ENGINES[engine])
+        for game in games
+    ]
+
+
+def describe(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+
+    ordered = sorted(values)
+    last = len(ordered) - 1
+
+    return {
+        'min': ordered[0],
+        'p25': ordered[last // 4],
+        'median': median(ordered),
+        'p75': ordered[last * 3 // 4],
+        'p90': ordered[last * 9 // 10],
+        'max': ordered[-1],
+        'mean': mean(ordered),
+    }
+
+
+def summarize(results: List[GameResult]) -> Dict[str, object]:
+    wins = [result for result in results if result.won]
+
+    return {
+        'games': len(results),
+        'win_rate': len(wins) / len(results) if results else 0.0,
+        'turns_to_clear': describe([result.turns for result in wins]),
+        'score': describe([result.score for result in results]),
+        'balls_used': describe([result.balls for result in results]),
+    }
+
+
+def get_levels(source: str) -> Dict[int, Level]:
+    """Уровни из папки с текстовыми файлами или из набора уровней."""
+    if os.path.isfile(source):
+        pack = LevelPack(source)
+        try:
+            return {number: pack.load(number) for number in pack}
+        finally:
+            pack.close()
+
+    return read_text_levels(source)
+
+
+def estimate_time(
+    levels: Dict[int, Level],
+    strategies: List[str],
+    games: int,
+    seed: int = ANALYTICS_SEED,
+    engine: str = 'event',
+    workers: Optional[int] = None,
+) -> float:
+    """Сколько секунд займёт analyze с теми же параметрами.
+
+    Оценка грубая: на первом уровне играется ANALYTICS_SAMPLE партий
+    каждой стратегии, а уровни считаются одинаково долгими.
+    """
+    level = levels[min(levels)]
+
+    started = perf_counter()
+    for strategy in strategies:
+        play_games(level, strategy, range(ANALYTICS_SAMPLE), seed, engine)
+    elapsed = perf_counter() - started
+
+    workers = workers or os.cpu_count() or 1
+
+    return elapsed / ANALYTICS_SAMPLE * games * len(levels) / workers
+
+
+def analyze(
+    levels: Dict[int, Level],
+    strategies: List[str],
+    games: int,
+    seed: int = ANALYTICS_SEED,
+    engine: str = 'event',
+    workers: Optional[int] = None,
+) -> Dict[str, Dict[str, Dict[str, object]]]:
+    """Статистика по каждому уровню и стратегии.
+
+    Партия определяется уровнем, стратегией и своим зерном, поэтому
+    итог не зависит от числа работников и порядка, в котором они
+    закончили.
+    """
+    results: Dict[Tuple[int, str], List[GameResult]] = {
+        (number, strategy): []
+        for number in levels
+        for strategy in strategies
+    }
+
+    with ProcessPoolExecutor(
+        workers, mp_context=get_pool_context()
+    ) as executor:
+        futures = {
+            executor.submit(
+                play_games,
+                levels[number],
+                strategy,
+                range(start, min(start + ANALYTICS_CHUNK, games)),
+                seed,
+                engine,
+            ): (number, strategy)
+            for number, strategy in results
+            for start in range(0, games, ANALYTICS_CHUNK)
+        }
+
+        for future in as_completed(futures):
+            results[futures[future]].extend(future.result())
+
+    report: Dict[str, Dict[str, Dict[str, object]]] = {}
+    for (number, strategy), level_results in results.items():
+        report.setdefault(f'level_{number}', {})[strategy] = summarize(
+            level_results
+        )
+
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Сложность уровней: тысячи партий без экрана'
+    )
+    parser.add_argument(
+        'source',
+        nargs='?',
+        default='App/levels',
+        help='папка с level_*.txt или файл набора уровней',
+    )
+    parser.add_argument('--games', type=int, default=ANALYTICS_GAMES)
+    parser.add_argument(
+        '--strategies',
+        nargs='+',
+        choices=STRATEGIES,
+        default=list(STRATEGIES),
+    )
+    parser.add_argument('--seed', type=int, default=ANALYTICS_SEED)
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        default='event',
+        help='оба движка считают по правилам игры, event быстрее',
+    )
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='analytics_output.json')
+    args = parser.parse_args()
+
+    levels = get_levels(args.source)
+    if not levels:
+        sys.exit(f'Уровни не найдены: {args.source}')
+
+    estimate = estimate_time(
+        levels,
+        args.strategies,
+        args.games,
+        args.seed,
+        args.engine,
+        args.workers,
+    )
+    print(
+        f'{len(levels)} уровней по {args.games} партий, '
+        f'примерно {estimate / 60:.1f} мин',
+        file=sys.stderr,
+    )
+
+    report = analyze(
+        levels,
+        args.strategies,
+        args.games,
+        args.seed,
+        args.engine,
+        args.workers,
+    )
+
+    with open(args.output, 'w') as output_file:
+        json.dump(report, output_file, indent=2, ensure_ascii=False)
+
+    for level, strategies in report.items():
+        print(level)
+        for strategy, stats in strategies.items():
+            turns = stats['turns_to_clear'].get('median', '-')
+            print(
+                f'  {strategy}: побед {stats["win_rate"]:.1%}, '
+                f'ходов до победы {turns}, '
+                f'счёт {stats["score"]["median"]}, '
+                f'шариков {stats["balls_used"]["median"]}'
+            )
+
+
+if __name__ == '__main__':
+    main()
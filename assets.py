@@ -0,0 +1,192 @@
+import pygame
+import threading
+
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class Asset:
+    """Ресурс, который загружается один раз: в фоне или по первому запросу.
+
+    Если файла нет или его не удалось прочитать, вместо него молча
+    подставляется запасное значение.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        loader: Callable[[str], Any],
+        fallback: Callable[[], Any] = lambda: None,
+    ) -> None:
+        self.file_name = file_name
+        self.loader = loader
+        self.fallback = fallback
+
+        self.value = None
+        self.missing = False
+        self.load_time = 0.0
+
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+
+    def load(self) -> None:
+        with self.lock:
+            if self.ready.is_set():
+                return None
+
+            started = perf_counter()
+            try:
+                self.value = self.loader(self.file_name)
+            except (pygame.error, OSError):
+                self.value = self.fallback()
+                self.missing = True
+
+            self.load_time = perf_counter() - started
+            self.ready.set()
+
+    def get(self) -> Any:
+        if not self.ready.is_set():
+            self.load()
+
+        return self.value
+
+
+class LazySound(Asset):
+    def __init__(self, file_name: str) -> None:
+        super().__init__(file_name, pygame.mixer.Sound)
+
+    def peek(self) -> Optional[pygame.mixer.Sound]:
+        """Звук, если он уже загружен; загрузку не ждёт."""
+        return self.value if self.ready.is_set() else None
+
+
+class LazyImage(Asset):
+    def __init__(self, file_name: str) -> None:
+        super().__init__(
+            file_name,
+            pygame.image.load,
+            lambda: pygame.Surface((1, 1), pygame.SRCALPHA),
+        )
+        self.surface: Optional[pygame.surface.Surface] = None
+
+    def get(self) -> pygame.surface.Surface:
+        # Декодирование может идти в фоне, а convert_alpha — только здесь,
+        # в главном потоке, где создано окно
+        if self.surface is None:
+            self.surface = super().get().convert_alpha()
+
+        return self.surface
+
+
+class Music(Asset):
+    def __init__(self, file_name: str, volume: float) -> None:
+        super().__init__(file_name, self._start)
+        self.volume = volume
+
+    def _start(self, file_name: str) -> bool:
+        pygame.mixer.music.load(file_name)
+        pygame.mixer.music.set_volume(self.volume)
+        pygame.mixer.music.play(-1)
+
+        return True
+
+
+class AssetManager:
+    """Ресурсы игры и замер времени до первого кадра.
+
+    Для стартового экрана синхронно загружаются только шрифты и
+    картинки, которые на нём нарисованы, а звуки и музыка подгружаются
+    в фоновом потоке.
+    """
+
+    def __init__(self) -> None:
+        self.assets: Dict[str, Asset] = {}
+        self.queue: List[Asset] = []
+        self.thread: Optional[threading.Thread] = None
+
+        self.started = perf_counter()
+        self.last_mark = self.started
+        self.phases: List[Tuple[str, float]] = []
+        self.first_frame_time: Optional[float] = None
+        self.preload_time: Optional[float] = None
+
+    def _register(self, asset: Asset, preload: bool) -> Asset:
+        if asset.file_name not in self.assets:
+            self.assets[asset.file_name] = asset
+            if preload:
+                self.queue.append(asset)
+
+        return self.assets[asset.file_name]
+
+    def sound(self, file_name: str) -> LazySound:
+        return self._register(LazySound(file_name), True)
+
+    def image(self, file_name: str) -> LazyImage:
+        return self._register(LazyImage(file_name), True)
+
+    def music(self, file_name: str, volume: float) -> Music:
+        return self._register(Music(file_name, volume), True)
+
+    def font(self, file_name: str, size: int) -> pygame.font.Font:
+        try:
+            return pygame.font.Font(file_name, size)
+        except (pygame.error, OSError):
+            return pygame.font.Font(None, size)
+
+    def start_preloading(self) -> None:
+        self.thread = threading.Thread(target=self._preload, daemon=True)
+        self.thread.start()
+
+    def _preload(self) -> None:
+        started = perf_counter()
+
+        for asset in self.queue:
+            asset.load()
+
+        self.preload_time = perf_counter() - started
+
+    def mark(self, phase: str) -> None:
+        now = perf_counter()
+        self.phases.append((phase, now - self.last_mark))
+        self.last_mark = now
+
+    def first_frame(self) -> bool:
+        """Отмечает первый кадр, True — только при первом вызове."""
+        if self.first_frame_time is not None:
+            return False
+
+        self.mark('первый кадр')
+        self.first_frame_time = self.last_mark - self.started
+
+        return True
+
+    def missing(self) -> List[str]:
+        return [
+            asset.file_name
+            for asset in self.assets.values()
+            if asset.ready.is_set() and asset.missing
+        ]
+
+    def report(self) -> str:
+        lines = [
+            f'{phase}: {seconds * 1000:.1f} мс'
+            for phase, seconds in self.phases
+        ]
+
+        if self.first_frame_time is not None:
+            lines.append(
+                f'До первого кадра: {self.first_frame_time * 1000:.1f} мс'
+            )
+
+        if self.preload_time is not None:
+            lines.append(
+                f'Фоновая загрузка: {self.preload_time * 1000:.1f} мс'
+            )
+        else:
+            loaded = sum(asset.ready.is_set() for asset in self.queue)
+            lines.append(f'Фоновая загрузка: {loaded}/{len(self.queue)}')
+
+        for file_name in self.missing():
+            lines.append(f'Не найден: {file_name}')
+
+        return '\n'.join(lines)
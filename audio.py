@@ -0,0 +1,98 @@
+import pygame
+
+from math import log2
+from typing import Dict, List
+
+from assets import LazySound
+
+
+class SoundDispatcher:
+    """Очередь звуков, которая отдаётся микшеру один раз за кадр.
+
+    Физика только считает, сколько раз за кадр прозвучал каждый звук.
+    В flush() повторы одного звука сливаются в один голос, который тем
+    громче, чем больше было повторов. Число голосов одного звука и
+    общее число каналов ограничены, а важные звуки (интерфейс, конец
+    уровня) играют на полной громкости на отдельных, зарезервированных
+    каналах.
+    """
+
+    def __init__(
+        self,
+        channels: int,
+        reserved: int,
+        voices: int,
+        volume: float,
+        stack_gain: float,
+    ) -> None:
+        self.voices = voices
+        self.volume = volume
+        self.stack_gain = stack_gain
+
+        self.requests: Dict[LazySound, int] = {}
+        self.important: Dict[LazySound, int] = {}
+        self.playing: Dict[LazySound, List[pygame.mixer.Channel]] = {}
+
+        self.enabled = bool(pygame.mixer.get_init())
+        self.reserved: List[pygame.mixer.Channel] = []
+
+        if self.enabled:
+            pygame.mixer.set_num_channels(channels)
+            pygame.mixer.set_reserved(reserved)
+            self.reserved = [pygame.mixer.Channel(i) for i in range(reserved)]
+
+    def play(self, sound: LazySound, important: bool = False) -> None:
+        requests = self.important if important else self.requests
+        requests[sound] = requests.get(sound, 0) + 1
+
+    def get_volume(self, count: int) -> float:
+        return min(self.volume * (1 + self.stack_gain * log2(count)), 1.0)
+
+    def flush(self) -> None:
+        if self.enabled:
+            for sound in self.important:
+                self._start(sound, 1.0, self._reserved_channel)
+
+            for sound, count in self.requests.items():
+                self._start(
+                    sound, self.get_volume(count), pygame.mixer.find_channel
+                )
+
+        self.important.clear()
+        self.requests.clear()
+
+    def _reserved_channel(self) -> pygame.mixer.Channel:
+        for channel in self.reserved:
+            if not channel.get_busy():
+                return channel
+
+        return self.reserved[0]
+
+    def _start(
+        self, sound: LazySound, volume: float, find_channel
+    ) -> None:
+        # Звук, который ещё не загрузился, пропускается: ждать его
+        # значило бы задержать кадр
+        raw = sound.peek()
+        if raw is None:
+            return None
+
+        voices = [
+            channel
+            for channel in self.playing.get(sound, [])
+            if channel.get_busy() and channel.get_sound() is raw
+        ]
+
+        # Лимит голосов: вместо нового голоса перезапускается самый старый
+        if len(voices) >= self.voices:
+            channel = voices.pop(0)
+        else:
+            channel = find_channel()
+            if channel is None:
+                return None
+
+        channel.play(raw)
+        channel.set_volume(volume)
+
+        voices.append(channel)
+        self.playing[sound] = voices
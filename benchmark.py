@@ -0,0 +1,368 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import sys
+import json
+import argparse
+import platform
+
+from math import inf, radians
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+import PyBall
+from levelpack import Level, read_text_levels
+
+# КОНФИГУРАЦИЯ #
+BENCH_FRAMES = 300
+# Кадр длится столько миллисекунд, как при 60 FPS
+BENCH_FRAME_MS = 1000 // 60
+# Ускорение времени из SPEED_MODES, чтобы на поле было больше шариков
+BENCH_SPEED_MODE = 2
+BENCH_ANGLE = radians(-70)
+# Каждый сценарий повторяется, для сравнения берётся лучший повтор:
+# так меньше влияют посторонние процессы
+BENCH_REPEATS = 3
+
+# Синтетические поля: (шариков, блоков, прочность блоков)
+STRESS_BOARDS = ((50, 20, 10), (200, 60, 50), (1000, 70, 500))
+# Большие уровни, которые не помещаются в окно: (шариков, ширина, высота,
+# прочность блоков); блоками заполнено всё, кроме двух нижних рядов
+LARGE_BOARDS = ((200, 60, 400, 50),)
+# Уровни-рои: (шариков, блоков, прочность блоков)
+SWARM_BOARDS = ((5000, 40, 1000), (10000, 40, 1000))
+
+# Насколько медиана может вырасти относительно эталона
+REGRESSION_THRESHOLD = 0.2
+# Разница меньше этой считается шумом, сколько бы раз она ни составила
+REGRESSION_NOISE_MS = 0.05
+# ============ #
+
+
+def get_levels() -> Dict[str, Level]:
+    return {
+        f'level_{number}': level
+        for number, level in read_text_levels('App/levels').items()
+    }
+
+
+def make_stress_board(
+    balls: int,
+    blocks: int,
+    number: int,
+    width: int = PyBall.VIEW_WIDTH,
+    height: int = PyBall.VIEW_HEIGHT,
+    swarm: bool = False,
+) -> Level:
+    """Поле (по умолчанию с окно), блоки заполняют ряды сверху вниз.
+
+    Два нижних ряда остаются пустыми, чтобы игра не закончилась после
+    первого же хода.
+    """
+    blocks = min(blocks, width * (height - 2))
+
+    level_map = [[' '] * width for _ in range(height)]
+    for i in range(blocks):
+        level_map[i // width][i % width] = str(number)
+
+    return level_map, balls, swarm
+
+
+class Timer:
+    """Суммирует время вызовов обёрнутой функции в пределах кадра."""
+
+    def __init__(self) -> None:
+        self.frame = 0.0
+        self.frames: List[float] = []
+
+    def wrap(self, function: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.frame += perf_counter() - started
+
+        return timed
+
+    def end_frame(self) -> None:
+        self.frames.append(self.frame)
+        self.frame = 0.0
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {'median_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0, 'count': 0}
+
+    ordered = sorted(samples)
+
+    return {
+        'median_ms': median(ordered) * 1000,
+        'p95_ms': ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+        'max_ms': ordered[-1] * 1000,
+        'count': len(ordered),
+    }
+
+
+def run_game(level: Level, frames: int) -> Dict[str, Dict[str, float]]:
+    """Кадры game_screen с фиксированным шагом времени и выстрелами."""
+    PyBall.clear_sprites(PyBall.all_sprites)
+    PyBall.particles.clear()
+
+    game_map = PyBall.GameMap(*level)
+    game_map.speed_mode = BENCH_SPEED_MODE
+    camera = game_map.get_camera()
+    PyBall.canvas.reset(camera=camera, query=game_map.find_static)
+
+    balls = Timer()
+    renders = Timer()
+    PyBall.balls_group.update = balls.wrap(PyBall.balls_group.update)
+    block_update = PyBall.Block._update
+    PyBall.Block._update = renders.wrap(block_update)
+
+    # С бюджетом физики тяжёлый кадр всегда стоил бы около
+    # PHYSICS_BUDGET мс, и рост цены тика не был бы виден
+    physics_budget = PyBall.PHYSICS_BUDGET
+    PyBall.PHYSICS_BUDGET = inf
+
+    ticks = [0]
+    tick = game_map.tick
+
+    def counted_tick():
+        ticks[0] += 1
+        return tick()
+
+    game_map.tick = counted_tick
+
+    frame_times, update_times, draw_times, full_draw_times = [], [], [], []
+    tick_times = []
+
+    try:
+        for _ in range(frames):
+            started = perf_counter()
+            PyBall.canvas.begin()
+
+            if not game_map.is_shoot:
+                game_map.shoot(BENCH_ANGLE)
+                game_map.speed_mode = BENCH_SPEED_MODE
+
+            update_started = perf_counter()
+            ticks[0] = 0
+            code = game_map.update(BENCH_FRAME_MS)
+            update_times.append(perf_counter() - update_started)
+            if ticks[0]:
+                tick_times.append(update_times[-1] / ticks[0])
+
+            PyBall.particles.update(camera.rect)
+
+            draw_started = perf_counter()
+            PyBall.canvas.draw_batch(
+                PyBall.get_ball_image(),
+                [ball.rect.topleft for ball in PyBall.balls_group],
+            )
+            draw_times.append(perf_counter() - draw_started)
+
+            PyBall.canvas.add(
+                PyBall.particles.draw(PyBall.screen, camera.rect.topleft)
+            )
+            PyBall.canvas.flip()
+            PyBall.audio.flush()
+
+            frame_times.append(perf_counter() - started)
+            balls.end_frame()
+            renders.end_frame()
+
+            # Полная отрисовка всех спрайтов, как без DIRTY_RENDERING
+            draw_started = perf_counter()
+            PyBall.all_sprites.draw(PyBall.screen)
+            full_draw_times.append(perf_counter() - draw_started)
+
+            if code:
+                break
+    finally:
+        del PyBall.balls_group.update
+        PyBall.Block._update = block_update
+        PyBall.PHYSICS_BUDGET = physics_budget
+
+    return {
+        'frame': summarize(frame_times),
+        'game_map_update': summarize(update_times),
+        'physics_tick': summarize(tick_times),
+        'ball_update': summarize(balls.frames),
+        'block_render': summarize(renders.frames),
+        'canvas_draw': summarize(draw_times),
+        'all_sprites_draw': summarize(full_draw_times),
+    }
+
+
+def run_block_render(level: Level) -> Dict[str, Dict[str, float]]:
+    """Перерисовка всех блоков уровня с пустым и с прогретым кэшем."""
+    PyBall.clear_sprites(PyBall.all_sprites)
+    PyBall.GameMap(*level)
+
+    blocks = PyBall.blocks_group.sprites()
+    results = {}
+
+    for name in ('block_render_cold', 'block_render_warm'):
+        if name == 'block_render_cold':
+            PyBall.get_block_tile.cache_clear()
+
+        started = perf_counter()
+        for block in blocks:
+            block._update()
+
+        results[name] = summarize([perf_counter() - started])
+
+    return results
+
+
+def run_menu(frames: int) -> Dict[str, Dict[str, float]]:
+    """all_sprites.update на стартовом экране: шарики и анимация."""
+    PyBall.clear_sprites(PyBall.all_sprites)
+    PyBall.rng.seed(0)
+
+    for _ in range(20):
+        PyBall.SimpleBall()
+    PyBall.AnimatedSprite(
+        PyBall.load_image('fox'), 14, 1, PyBall.screen.get_width() / 2, 100
+    )
+
+    samples = []
+    for _ in range(frames):
+        started = perf_counter()
+        PyBall.all_sprites.update()
+        samples.append(perf_counter() - started)
+
+    PyBall.clear_sprites(PyBall.all_sprites)
+
+    return {'all_sprites_update': summarize(samples)}
+
+
+def best_of(
+    run: Callable[[], Dict[str, Dict[str, float]]], repeats: int
+) -> Dict[str, Dict[str, float]]:
+    best = {}
+
+    for _ in range(repeats):
+        for metric, values in run().items():
+            if (
+                metric not in best
+                or values['median_ms'] < best[metric]['median_ms']
+            ):
+                best[metric] = values
+
+    return best
+
+
+def run_suite(
+    frames: int, repeats: int = BENCH_REPEATS
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    scenarios = dict(get_levels())
+    for balls, blocks, number in STRESS_BOARDS:
+        scenarios[f'stress_{balls}x{blocks}'] = make_stress_board(
+            balls, blocks, number
+        )
+    for balls, blocks, number in SWARM_BOARDS:
+        scenarios[f'swarm_{balls}'] = make_stress_board(
+            balls, blocks, number, swarm=True
+        )
+    for balls, width, height, number in LARGE_BOARDS:
+        scenarios[f'large_{width}x{height}'] = make_stress_board(
+            balls, width * height, number, width, height
+        )
+
+    results = {}
+    for name, level in scenarios.items():
+        results[name] = best_of(lambda: run_game(level, frames), repeats)
+        results[name].update(
+            best_of(lambda: run_block_render(level), repeats)
+        )
+
+    results['menu'] = best_of(lambda: run_menu(frames), repeats)
+
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict[str, float]]],
+    baseline: Dict[str, Dict[str, Dict[str, float]]],
+    threshold: float,
+) -> List[str]:
+    """Метрики, медиана которых выросла больше чем на threshold."""
+    regressions = []
+
+    for scenario, metrics in results.items():
+        for metric, values in metrics.items():
+            old = baseline.get(scenario, {}).get(metric)
+            if not old or not old['median_ms']:
+                continue
+
+            ratio = values['median_ms'] / old['median_ms']
+            growth = values['median_ms'] - old['median_ms']
+
+            if ratio > 1 + threshold and growth > REGRESSION_NOISE_MS:
+                regressions.append(
+                    f'{scenario}.{metric}: {old["median_ms"]:.3f} -> '
+                    f'{values["median_ms"]:.3f} мс (x{ratio:.2f})'
+                )
+
+    return regressions
+
+
+def main() -> Optional[int]:
+    parser = argparse.ArgumentParser(
+        description='Замеры горячих участков игры без окна и звука'
+    )
+    parser.add_argument('--frames', type=int, default=BENCH_FRAMES)
+    parser.add_argument('--repeats', type=int, default=BENCH_REPEATS)
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--baseline', help='JSON прошлого запуска')
+    parser.add_argument(
+        '--threshold', type=float, default=REGRESSION_THRESHOLD
+    )
+    args = parser.parse_args()
+
+    results = run_suite(args.frames, args.repeats)
+
+    with open(args.output, 'w') as output_file:
+        json.dump(
+            {
+                'meta': {
+                    'python': platform.python_version(),
+                    'pygame': PyBall.pygame.version.ver,
+                    'machine': platform.machine(),
+                    'frames': args.frames,
+                    'repeats': args.repeats,
+                },
+                'results': results,
+            },
+            output_file,
+            indent=2,
+        )
+
+    for scenario, metrics in results.items():
+        print(scenario)
+        for metric, values in metrics.items():
+            print(
+                f'  {metric}: {values["median_ms"]:.3f} мс '
+                f'(p95 {values["p95_ms"]:.3f})'
+            )
+
+    if args.baseline is None:
+        return None
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f'Регрессия: {line}')
+
+    return 1 if regressions else None
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,360 @@
+import os
+import sys
+import struct
+import argparse
+
+from array import array
+from math import inf, pi, radians
+from time import perf_counter, time
+from dataclasses import dataclass
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.context import BaseContext
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from typing import List, Optional, Tuple, Type
+
+from simulation import (
+    Board,
+    GameCodes,
+    Shot,
+    ShotResult,
+    load_level,
+    simulate_shot,
+)
+from trajectory import EventShot
+
+# КОНФИГУРАЦИЯ #
+BOT_CANDIDATES = 256
+# Шарики, пущенные положе 30°, сразу касаются линии, их бот не пробует
+BOT_MIN_ELEVATION = radians(30)
+# Сколько секунд бот может думать над ходом
+BOT_TIME_BUDGET = 1.0
+BOT_CHUNKS_PER_WORKER = 4
+
+DESTROYED_WEIGHT = 10
+ROWS_LEFT_WEIGHT = 5
+
+# Оба движка считают ход по правилам игры, 'event' перелетает пустоту
+# разом и поэтому быстрее
+ENGINES = {'tick': Shot, 'event': EventShot}
+# ============ #
+
+BOARD_HEADER = struct.Struct('<HHIdq?')
+EMPTY_CELL = -1
+
+
+def get_pool_context() -> BaseContext:
+    """Способ запуска процессов для пулов бота, аналитики и сервиса.
+
+    Работникам не нужен экран, поэтому там, где можно, процессы
+    копируются fork'ом, а не запускают главный модуль игры заново.
+    """
+    if 'fork' in get_all_start_methods():
+        return get_context('fork')
+
+    return get_context()
+
+
+def pack_board(board: Board) -> bytes:
+    """Доска в компактном виде для передачи в процессы-работники."""
+    cells = array(
+        'i',
+        (
+            EMPTY_CELL if cell is None else cell
+            for row in board.cells
+            for cell in row
+        ),
+    )
+
+    return (
+        BOARD_HEADER.pack(
+            board.width,
+            board.height,
+            board.ball_count,
+            board.departure.x,
+            board.score,
+            board.swarm,
+        )
+        + cells.tobytes()
+    )
+
+
+def unpack_board(data: bytes) -> Board:
+    (
+        width,
+        height,
+        ball_count,
+        departure_x,
+        score,
+        swarm,
+    ) = BOARD_HEADER.unpack_from(data)
+
+    cells = array('i')
+    cells.frombytes(data[BOARD_HEADER.size:])
+
+    return Board(
+        [
+            [
+                None if cell == EMPTY_CELL else cell
+                for cell in cells[y * width:(y + 1) * width]
+            ]
+            for y in range(height)
+        ],
+        ball_count,
+        departure_x,
+        score,
+        swarm,
+    )
+
+
+def get_candidate_angles(count: int = BOT_CANDIDATES) -> List[float]:
+    low, high = -pi + BOT_MIN_ELEVATION, -BOT_MIN_ELEVATION
+
+    return [low + (high - low) * i / (count - 1) for i in range(count)]
+
+
+@dataclass
+class Candidate:
+    angle: float
+    rating: Tuple[float, int]
+    code: Optional[int]
+    damage: int
+    destroyed: int
+    rows_left: int
+
+
+@dataclass
+class SearchResult:
+    best: Candidate
+    evaluated: int
+    total: int
+    elapsed: float
+
+
+def rate_shot(result: ShotResult) -> Tuple[float, int]:
+    """Чем больше, тем лучше; при равенстве выигрывает более быстрый ход."""
+    if result.code == GameCodes.win:
+        value = inf
+    elif result.code == GameCodes.game_over:
+        value = -inf
+    else:
+        value = (
+            result.damage
+            + DESTROYED_WEIGHT * result.destroyed
+            + ROWS_LEFT_WEIGHT * result.board.rows_left()
+        )
+
+    return value, -result.ticks
+
+
+def rate_angles(
+    data: bytes,
+    angles: List[float],
+    engine: Type[Shot],
+    deadline: float = inf,
+    required: int = 0,
+) -> List[Candidate]:
+    """Оценки углов по порядку, пока не наступит deadline.
+
+    Срок сверяется с time(), а не с perf_counter(): часы должны быть
+    общими у всех процессов. Первые required углов оцениваются в любом
+    случае, чтобы у поиска был хоть один ход.
+    """
+    board = unpack_board(data)
+    candidates = []
+
+    for angle in angles:
+        if len(candidates) >= required and time() >= deadline:
+            break
+
+        result = simulate_shot(board, angle, engine)
+        candidates.append(
+            Candidate(
+                angle,
+                rate_shot(result),
+                result.code,
+                result.damage,
+                result.destroyed,
+                result.board.rows_left(),
+            )
+        )
+
+    return candidates
+
+
+class Search:
+    """Поиск хода, идущий в фоне.
+
+    Игра опрашивает done() каждый кадр и забирает result(), когда он
+    готов; ни то ни другое не ждёт работников. Работники сами бросают
+    углы после срока, поэтому недосчитанные куски не занимают пул до
+    следующего поиска. Если работник упал, поиск готов сразу: failed()
+    возвращает ошибку, а result() её поднимает.
+    """
+
+    def __init__(self, futures: List[Future], total: int, budget: float):
+        self.futures = futures
+        self.total = total
+        self.started = perf_counter()
+        self.deadline = self.started + budget
+
+    def _finished(self) -> List[Future]:
+        return [
+            future
+            for future in self.futures
+            if future.done() and not future.cancelled()
+        ]
+
+    def failed(self) -> Optional[BaseException]:
+        """Ошибка первого упавшего куска или None."""
+        for future in self._finished():
+            error = future.exception()
+            if error is not None:
+                return error
+
+        return None
+
+    def done(self) -> bool:
+        """Готов ли результат: все куски досчитаны, какой-то из них упал
+        или срок вышел и есть хотя бы одна оценка."""
+        finished = self._finished()
+        if len(finished) == len(self.futures) or self.failed():
+            return True
+
+        return perf_counter() >= self.deadline and any(
+            future.result() for future in finished
+        )
+
+    def wait_result(self) -> SearchResult:
+        """Блокирующий result() для запуска без экрана."""
+        while not self.done():
+            pending = [future for future in self.futures if not future.done()]
+            wait(
+                pending,
+                max(self.deadline - perf_counter(), 0) or None,
+                FIRST_COMPLETED,
+            )
+
+        return self.result()
+
+    def result(self) -> SearchResult:
+        if not self.done():
+            raise RuntimeError('Поиск хода ещё не закончен')
+
+        for future in self.futures:
+            future.cancel()
+
+        error = self.failed()
+        if error is not None:
+            raise error
+
+        candidates = [
+            candidate
+            for future in self._finished()
+            for candidate in future.result()
+        ]
+
+        return SearchResult(
+            max(candidates, key=lambda candidate: candidate.rating),
+            len(candidates),
+            self.total,
+            perf_counter() - self.started,
+        )
+
+
+class Bot:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        candidates: int = BOT_CANDIDATES,
+        budget: float = BOT_TIME_BUDGET,
+        engine: Type[Shot] = EventShot,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            self.workers, mp_context=get_pool_context()
+        )
+
+        self.angles = get_candidate_angles(candidates)
+        self.budget = budget
+        self.engine = engine
+
+    def start(self, board: Board) -> Search:
+        data = pack_board(board)
+        chunks = self.workers * BOT_CHUNKS_PER_WORKER
+        deadline = time() + self.budget
+
+        # Первый кусок оценивает хотя бы один угол даже после срока
+        futures = [
+            self.executor.submit(
+                rate_angles,
+                data,
+                self.angles[i::chunks],
+                self.engine,
+                deadline,
+                int(i == 0),
+            )
+            for i in range(min(chunks, len(self.angles)))
+        ]
+
+        return Search(futures, len(self.angles), self.budget)
+
+    def best_shot(self, board: Board) -> SearchResult:
+        return self.start(board).wait_result()
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> 'Bot':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def play_level(bot: Bot, board: Board, max_turns: int = 1000) -> int:
+    """Играет уровень до конца по правилам игры, печатая каждый ход."""
+    for turn in range(1, max_turns + 1):
+        search = bot.best_shot(board)
+        result = simulate_shot(board, search.best.angle)
+        board = result.board
+
+        print(
+            f'Ход {turn}: угол {search.best.angle:.4f}, '
+            f'счёт {board.score}, блоков {board.block_count()}, '
+            f'поиск {search.elapsed * 1000:.0f} мс '
+            f'({search.evaluated}/{search.total} углов)'
+        )
+
+        if result.code:
+            return result.code
+
+    return GameCodes.game_over
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Бот PyBall: проходит уровень без экрана'
+    )
+    parser.add_argument('level', nargs='?', default=1)
+    parser.add_argument('--engine', choices=ENGINES, default='event')
+    parser.add_argument('--candidates', type=int, default=BOT_CANDIDATES)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--budget', type=float, default=BOT_TIME_BUDGET)
+    args = parser.parse_args()
+
+    with Bot(
+        args.workers, args.candidates, args.budget, ENGINES[args.engine]
+    ) as bot:
+        code = play_level(bot, Board.from_level(*load_level(args.level)))
+
+    print('Победа' if code == GameCodes.win else 'Game Over')
+    sys.exit(0 if code == GameCodes.win else 1)
+
+
+if __name__ == '__main__':
+    main()
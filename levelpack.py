@@ -0,0 +1,206 @@
+import os
+import sys
+import mmap
+import struct
+import argparse
+
+from array import array
+from glob import glob
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# КОНФИГУРАЦИЯ #
+PACK_MAGIC = b'PYLP'
+PACK_VERSION = 2
+# Звёздочка после числа шариков включает режим роя, см. SWARM_SPAWN_TICKS
+SWARM_MARK = '*'
+# ============ #
+
+# Заголовок: метка, версия, номер первого уровня, число записей в индексе
+PACK_HEADER = struct.Struct('<4sHII')
+# Запись индекса: смещение сетки, ширина, высота, число шариков, рой
+PACK_ENTRY = struct.Struct('<IHHI?')
+
+# Прочность хранится в uint16, максимальное значение — пустая клетка
+EMPTY_CELL = 0xFFFF
+
+Level = Tuple[List[List[str]], int, bool]
+
+
+def parse_ball_line(line: str) -> Tuple[int, bool]:
+    """Последняя строка уровня: число шариков и отметка роя."""
+    line = line.strip()
+    swarm = line.endswith(SWARM_MARK)
+
+    return int(line.rstrip(SWARM_MARK)), swarm
+
+
+def read_text_level(file_name: str) -> Level:
+    with open(file_name, 'r') as map_file:
+        lines = map_file.readlines()
+        level_map = [
+            [i for i in line.rstrip('\n').split('|')] for line in lines[:-1]
+        ]
+
+        return (level_map, *parse_ball_line(lines[-1]))
+
+
+def read_text_levels(folder: str) -> Dict[int, Level]:
+    """Все level_<номер>.txt из папки по возрастанию номера."""
+    levels = {}
+
+    for file_name in glob(os.path.join(folder, 'level_*.txt')):
+        number = os.path.basename(file_name)[len('level_'):-len('.txt')]
+        if number.isdigit():
+            levels[int(number)] = read_text_level(file_name)
+
+    return dict(sorted(levels.items()))
+
+
+def _to_cells(level_map: List[List[str]]) -> array:
+    cells = array('H')
+
+    for row in level_map:
+        for symbol in row:
+            if not symbol.isdigit():
+                cells.append(EMPTY_CELL)
+            elif int(symbol) >= EMPTY_CELL:
+                raise ValueError(f'Слишком прочный блок: {symbol}')
+            else:
+                cells.append(int(symbol))
+
+    if sys.byteorder == 'big':
+        cells.byteswap()
+
+    return cells
+
+
+def write_level_pack(file_name: str, levels: Dict[int, Level]) -> None:
+    """Собирает уровни в один файл; номера уровней могут идти с пропусками."""
+    first = min(levels) if levels else 1
+    count = max(levels) - first + 1 if levels else 0
+
+    entries = []
+    grids = []
+    offset = PACK_HEADER.size + PACK_ENTRY.size * count
+
+    for number in range(first, first + count):
+        if number not in levels:
+            entries.append(PACK_ENTRY.pack(0, 0, 0, 0, False))
+            continue
+
+        level_map, ball_count, swarm = levels[number]
+        grid = _to_cells(level_map).tobytes()
+
+        entries.append(
+            PACK_ENTRY.pack(
+                offset, len(level_map[0]), len(level_map), ball_count, swarm
+            )
+        )
+        grids.append(grid)
+        offset += len(grid)
+
+    # Пишем рядом и подменяем, чтобы игра не увидела недописанный файл
+    temp_name = file_name + '.tmp'
+    with open(temp_name, 'wb') as pack_file:
+        pack_file.write(
+            PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, first, count)
+        )
+        pack_file.writelines(entries)
+        pack_file.writelines(grids)
+
+    os.replace(temp_name, file_name)
+
+
+class LevelPack:
+    """Набор уровней в одном файле, читаемый через mmap.
+
+    Индекс в начале файла хранит смещение каждой сетки, поэтому любой
+    уровень загружается за одно обращение, без разбора остальных.
+    """
+
+    def __init__(self, file_name: str) -> None:
+        with open(file_name, 'rb') as pack_file:
+            self.data = mmap.mmap(
+                pack_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+
+        magic, version, self.first, self.count = PACK_HEADER.unpack_from(
+            self.data
+        )
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f'{file_name} не является набором уровней')
+
+    def _entry(
+        self, number: int
+    ) -> Optional[Tuple[int, int, int, int, bool]]:
+        index = number - self.first
+        if not 0 <= index < self.count:
+            return None
+
+        entry = PACK_ENTRY.unpack_from(
+            self.data, PACK_HEADER.size + PACK_ENTRY.size * index
+        )
+        if not entry[2]:
+            return None
+
+        return entry
+
+    def __contains__(self, number: int) -> bool:
+        return self._entry(number) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        for number in range(self.first, self.first + self.count):
+            if number in self:
+                yield number
+
+    def load_cells(
+        self, number: int
+    ) -> Tuple[List[List[Optional[int]]], int, bool]:
+        entry = self._entry(number)
+        if entry is None:
+            raise KeyError(number)
+
+        offset, width, height, ball_count, swarm = entry
+
+        cells = array('H')
+        cells.frombytes(self.data[offset:offset + 2 * width * height])
+        if sys.byteorder == 'big':
+            cells.byteswap()
+
+        return [
+            [
+                None if cell == EMPTY_CELL else cell
+                for cell in cells[y * width:(y + 1) * width]
+            ]
+            for y in range(height)
+        ], ball_count, swarm
+
+    def load(self, number: int) -> Level:
+        """Уровень в том же виде, что у текстового файла."""
+        cells, ball_count, swarm = self.load_cells(number)
+
+        return [
+            [' ' if cell is None else str(cell) for cell in row]
+            for row in cells
+        ], ball_count, swarm
+
+    def close(self) -> None:
+        self.data.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Собирает текстовые уровни PyBall в один файл'
+    )
+    parser.add_argument('source', nargs='?', default='App/levels')
+    parser.add_argument('output', nargs='?', default='App/levels.pack')
+    args = parser.parse_args()
+
+    levels = read_text_levels(args.source)
+    write_level_pack(args.output, levels)
+    print(f'Уровней записано: {len(levels)} -> {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+import os
+import json
+
+from collections import deque
+from dataclasses import dataclass
+from time import perf_counter, process_time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+@dataclass
+class FrameRecord:
+    start: float
+    end: float
+    # (фаза, начало, конец) по порядку кадра
+    spans: List[Tuple[str, float, float]]
+    # Суммарное время вложенных участков, например физики шариков
+    totals: Dict[str, float]
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def percentile(values: List[float], share: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[min(int(share * len(ordered)), len(ordered) - 1)]
+
+
+class CpuMeter:
+    """Доля одного ядра, которую процесс занял за последний интервал.
+
+    Считается по времени процессора всех потоков, поэтому в неё входят и
+    фоновая загрузка ресурсов, и сохранение.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.usage: Optional[float] = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.wall = perf_counter()
+        self.cpu = process_time()
+
+    def update(self) -> bool:
+        """True, если интервал прошёл и usage обновилась."""
+        wall = perf_counter() - self.wall
+        if wall < self.interval:
+            return False
+
+        self.usage = (process_time() - self.cpu) / wall
+        self.reset()
+
+        return True
+
+
+class FrameProfiler:
+    """Замер фаз каждого кадра.
+
+    Фазы цикла отмечаются вызовом mark() после их окончания. Функции,
+    которые вызываются много раз за кадр (физика шариков, столкновения),
+    оборачиваются таймером только пока профилировщик включён, поэтому
+    выключенный он стоит одной проверки флага на фазу.
+    """
+
+    def __init__(self, history: int) -> None:
+        self.enabled = False
+        self.frames: Deque[FrameRecord] = deque(maxlen=history)
+
+        self.targets: List[Tuple[Any, str, str]] = []
+        self.originals: List[Tuple[Any, str, Any]] = []
+
+        self.frame_start = 0.0
+        self.last = 0.0
+        self.spans: List[Tuple[str, float, float]] = []
+        self.totals: Dict[str, float] = {}
+
+    def instrument(self, owner: Any, attribute: str, phase: str) -> None:
+        """Считать время вызовов owner.attribute в фазу phase."""
+        self.targets.append((owner, attribute, phase))
+
+    def toggle(self) -> None:
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def enable(self) -> None:
+        if self.enabled:
+            return None
+
+        for owner, attribute, phase in self.targets:
+            self.originals.append(
+                (owner, attribute, vars(owner).get(attribute))
+            )
+            setattr(
+                owner, attribute, self._timed(getattr(owner, attribute), phase)
+            )
+
+        # Кадр, в котором профилировщик включили, считается с этого места
+        self.enabled = True
+        self.begin_frame()
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return None
+
+        for owner, attribute, original in reversed(self.originals):
+            if original is None:
+                delattr(owner, attribute)
+            else:
+                setattr(owner, attribute, original)
+
+        self.originals = []
+        self.enabled = False
+
+    def _timed(self, function: Callable, phase: str) -> Callable:
+        totals = self.totals
+
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                totals[phase] = totals.get(phase, 0.0) + (
+                    perf_counter() - started
+                )
+
+        return timed
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return None
+
+        self.frame_start = self.last = perf_counter()
+        self.spans = []
+        self.totals.clear()
+
+    def mark(self, phase: str) -> None:
+        if not self.enabled:
+            return None
+
+        now = perf_counter()
+        self.spans.append((phase, self.last, now))
+        self.last = now
+
+    def end_frame(self) -> None:
+        if not self.enabled:
+            return None
+
+        self.frames.append(
+            FrameRecord(
+                self.frame_start, self.last, self.spans, dict(self.totals)
+            )
+        )
+
+    def summary(self) -> List[str]:
+        """Строки для оверлея: перцентили кадра и среднее время фаз."""
+        durations = [frame.duration * 1000 for frame in self.frames]
+        lines = [
+            f'кадр p50 {percentile(durations, 0.5):.2f} '
+            f'p95 {percentile(durations, 0.95):.2f} '
+            f'p99 {percentile(durations, 0.99):.2f} '
+            f'max {max(durations, default=0):.2f} мс'
+        ]
+
+        phases: Dict[str, float] = {}
+        for frame in self.frames:
+            for phase, start, end in frame.spans:
+                phases[phase] = phases.get(phase, 0.0) + end - start
+            for phase, total in frame.totals.items():
+                phases[phase] = phases.get(phase, 0.0) + total
+
+        count = max(len(self.frames), 1)
+        for phase, total in phases.items():
+            lines.append(f'{phase}: {total * 1000 / count:.3f} мс')
+
+        return lines
+
+    def export_chrome_trace(self, file_name: str) -> None:
+        """Сохраняет кадры в формате trace event (chrome://tracing)."""
+        events = []
+
+        for frame in self.frames:
+            start = frame.start * 1e6
+            events.append(
+                {
+                    'name': 'frame',
+                    'ph': 'X',
+                    'ts': start,
+                    'dur': frame.duration * 1e6,
+                    'pid': 1,
+                    'tid': 1,
+                }
+            )
+            events.extend(
+                {
+                    'name': phase,
+                    'ph': 'X',
+                    'ts': begin * 1e6,
+                    'dur': (end - begin) * 1e6,
+                    'pid': 1,
+                    'tid': 1,
+                }
+                for phase, begin, end in frame.spans
+            )
+            # Вложенные участки разбросаны по кадру, поэтому пишутся
+            # счётчиками с суммой за кадр
+            events.extend(
+                {
+                    'name': phase,
+                    'ph': 'C',
+                    'ts': start,
+                    'pid': 1,
+                    'args': {'ms': total * 1000},
+                }
+                for phase, total in frame.totals.items()
+            )
+
+        folder = os.path.dirname(file_name)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        with open(file_name, 'w') as trace_file:
+            json.dump(
+                {'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file
+            )
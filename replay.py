@@ -0,0 +1,148 @@
+import os
+import struct
+import argparse
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from simulation import Board, GameCodes, load_level, simulate_shot
+
+# КОНФИГУРАЦИЯ #
+REPLAY_MAGIC = b'PYRP'
+REPLAY_VERSION = 1
+# ============ #
+
+# Заголовок: метка, версия, уровень, зерно случайных чисел, число выстрелов
+REPLAY_HEADER = struct.Struct('<4sHIQI')
+# Выстрел: время от начала уровня в мс, угол, точка прицела
+REPLAY_SHOT = struct.Struct('<Idhh')
+
+# Выстрел без точки прицела, например от бота
+NO_TARGET = (-1, -1)
+
+
+@dataclass
+class ReplayShot:
+    time: int
+    angle: float
+    target: Tuple[int, int] = NO_TARGET
+
+
+@dataclass
+class Replay:
+    """Запись партии: уровень, зерно для частиц и выстрелы по порядку.
+
+    Физика игры идёт фиксированными тиками и зависит только от углов,
+    поэтому угол хранится как есть (double), и партия повторяется
+    бит в бит без экрана или на экране с любой скоростью.
+    """
+
+    level: int
+    seed: int
+    shots: List[ReplayShot] = field(default_factory=list)
+
+    def add(
+        self, time: int, angle: float, target: Tuple[int, int] = NO_TARGET
+    ) -> None:
+        self.shots.append(ReplayShot(int(time), angle, target))
+
+    def to_bytes(self) -> bytes:
+        header = REPLAY_HEADER.pack(
+            REPLAY_MAGIC,
+            REPLAY_VERSION,
+            self.level,
+            self.seed,
+            len(self.shots),
+        )
+
+        return header + b''.join(
+            REPLAY_SHOT.pack(shot.time, shot.angle, *shot.target)
+            for shot in self.shots
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        magic, version, level, seed, count = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError('Это не запись партии PyBall')
+
+        shots = [
+            ReplayShot(time, angle, (x, y))
+            for time, angle, x, y in REPLAY_SHOT.iter_unpack(
+                data[REPLAY_HEADER.size:]
+            )
+        ][:count]
+
+        return cls(level, seed, shots)
+
+    def save(self, file_name: str) -> None:
+        folder = os.path.dirname(file_name)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        with open(file_name, 'wb') as replay_file:
+            replay_file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, file_name: str) -> 'Replay':
+        with open(file_name, 'rb') as replay_file:
+            return cls.from_bytes(replay_file.read())
+
+
+@dataclass
+class ReplayResult:
+    code: Optional[int]
+    score: int
+    turns: int
+    board: Board
+
+
+def play_headless(replay: Replay) -> ReplayResult:
+    """Разыгрывает запись без экрана с максимальной скоростью."""
+    board = Board.from_level(*load_level(replay.level))
+    code = None
+    turns = 0
+
+    for shot in replay.shots:
+        result = simulate_shot(board, shot.angle)
+        board = result.board
+        turns += 1
+
+        if result.code:
+            code = result.code
+            break
+
+    return ReplayResult(code, board.score, turns, board)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Просмотр записи партии')
+    parser.add_argument('replay')
+    parser.add_argument(
+        '--visual',
+        action='store_true',
+        help='показать партию в окне игры, а не только посчитать итог',
+    )
+    args = parser.parse_args()
+
+    replay = Replay.load(args.replay)
+
+    if args.visual:
+        import PyBall
+
+        PyBall.replay_screen(replay)
+
+    result = play_headless(replay)
+    outcome = {
+        GameCodes.win: 'победа',
+        GameCodes.game_over: 'Game Over',
+    }.get(result.code, 'не закончена')
+
+    print(
+        f'Уровень {replay.level}: {outcome}, счёт {result.score}, '
+        f'ходов {result.turns} из {len(replay.shots)}'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import threading
+
+from typing import Any, Dict, Optional
+from cryptography.fernet import Fernet, InvalidToken
+
+
+class SaveManager:
+    """Сохранение игры в фоновом потоке.
+
+    Кадр только отдаёт снимок данных, а шифрование и запись на диск идут
+    в отдельном потоке. Запросы, пришедшие во время записи, сливаются:
+    на диск попадает только последний снимок. Файл пишется рядом и
+    подменяется через os.replace, поэтому после сбоя остаётся целым
+    либо старое, либо новое сохранение.
+    """
+
+    def __init__(
+        self, save_path: str, key_path: str, defaults: Dict[str, Any]
+    ) -> None:
+        self.save_path = save_path
+        self.key_path = key_path
+        self.defaults = defaults
+
+        self.fernet: Optional[Fernet] = None
+        self.data: Optional[Dict[str, Any]] = None
+
+        self.condition = threading.Condition()
+        self.pending: Optional[bytes] = None
+        self.writing = False
+        self.closed = False
+
+        self.loader = threading.Thread(target=self._load, daemon=True)
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+
+    def start(self) -> None:
+        """Начинает чтение сохранения, пока игра готовит окно и ресурсы."""
+        self.loader.start()
+        self.writer.start()
+
+    def wait(self) -> Dict[str, Any]:
+        self.loader.join()
+        return self.data
+
+    def save(self, data: Dict[str, Any]) -> None:
+        snapshot = json.dumps(data).encode()
+
+        with self.condition:
+            self.pending = snapshot
+            self.condition.notify_all()
+
+    def flush(self) -> None:
+        with self.condition:
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+
+    def close(self) -> None:
+        """Дописывает последний снимок и останавливает поток записи."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+        self.writer.join()
+
+    def _load(self) -> None:
+        data = None
+
+        try:
+            data = self._read()
+        except (OSError, ValueError) as error:
+            # Без ключа сохранение не пишется, чтобы не затереть старое
+            print(f'Не удалось прочитать сохранение: {error}', file=sys.stderr)
+
+        self.data = data if data is not None else dict(self.defaults)
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        folder = os.path.dirname(self.save_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        if os.path.exists(self.key_path):
+            with open(self.key_path, 'rb') as key_file:
+                key = key_file.read()
+        else:
+            key = Fernet.generate_key()
+            self._replace(self.key_path, key)
+
+        self.fernet = Fernet(key)
+
+        data = None
+        if os.path.exists(self.save_path):
+            try:
+                with open(self.save_path, 'rb') as save_file:
+                    data = json.loads(self.fernet.decrypt(save_file.read()))
+            except (InvalidToken, ValueError):
+                print(
+                    'Сохранение повреждено, начата новая игра',
+                    file=sys.stderr,
+                )
+
+        return data
+
+    def _write_loop(self) -> None:
+        self.loader.join()
+
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+
+                if self.pending is None:
+                    return None
+
+                snapshot, self.pending = self.pending, None
+                if self.fernet is None:
+                    self.condition.notify_all()
+                    continue
+
+                self.writing = True
+
+            try:
+                self._replace(self.save_path, self.fernet.encrypt(snapshot))
+            except OSError as error:
+                print(f'Не удалось сохранить игру: {error}', file=sys.stderr)
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    @staticmethod
+    def _replace(file_name: str, content: bytes) -> None:
+        temp_name = file_name + '.tmp'
+
+        with open(temp_name, 'wb') as temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        os.replace(temp_name, file_name)
+
+
+def record_level(
+    data: Dict[str, Any],
+    level: int,
+    won: bool,
+    score: int,
+    turns: int,
+    best_shot: Optional[Dict[str, float]],
+) -> None:
+    """Добавляет попытку в историю уровня внутри сохранения."""
+    history = data.setdefault('history', {})
+    record = history.setdefault(
+        str(level),
+        {
+            'plays': 0,
+            'wins': 0,
+            'best_score': 0,
+            'best_turns': None,
+            'best_shot': None,
+        },
+    )
+
+    record['plays'] += 1
+
+    if won:
+        record['wins'] += 1
+        record['best_score'] = max(record['best_score'], score)
+
+        if record['best_turns'] is None or turns < record['best_turns']:
+            record['best_turns'] = turns
+
+    if best_shot is not None and (
+        record['best_shot'] is None
+        or best_shot['score'] > record['best_shot']['score']
+    ):
+        record['best_shot'] = best_shot
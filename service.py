@@ -0,0 +1,429 @@
+import json
+import asyncio
+import argparse
+
+from itertools import count
+from math import inf, isfinite
+from time import time
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from bot import ENGINES, get_pool_context, pack_board, unpack_board
+from simulation import (
+    BALL_RADIUS,
+    BLOCK_SIZE,
+    Board,
+    GameCodes,
+    level_exist,
+    load_level,
+)
+
+# КОНФИГУРАЦИЯ #
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8765
+# Сколько запросов одного соединения обрабатывается одновременно; пока
+# они не готовы, следующие строки не читаются
+SERVICE_PIPELINE = 64
+SERVICE_MAX_SESSIONS = 256
+# Самая длинная строка запроса: в ней может прийти целое поле
+SERVICE_LINE_LIMIT = 1 << 20
+
+# Пределы своего поля: время хода растёт с числом шариков и размером
+# поля, а упакованная доска хранит прочность в int32
+SERVICE_MAX_WIDTH = 50
+SERVICE_MAX_HEIGHT = 100
+SERVICE_MAX_BALLS = 5000
+SERVICE_MAX_NUMBER = 10 ** 6
+SERVICE_MAX_SCORE = 2 ** 53
+# Сколько секунд может считаться один ход, включая ожидание свободного
+# работника. Работник сам бросает ход после срока, так что долгий ход
+# одного клиента не занимает пул надолго
+SERVICE_SHOT_TIMEOUT = 10.0
+# Оба движка считают по правилам игры, 'event' быстрее
+SERVICE_ENGINE = 'event'
+# ============ #
+
+CODE_NAMES = {GameCodes.win: 'win', GameCodes.game_over: 'game_over'}
+
+
+class ServiceError(Exception):
+    """Ошибка в запросе, её текст уходит клиенту."""
+
+
+@dataclass
+class Session:
+    board: Board
+    engine: str
+    code: Optional[int] = None
+    turns: int = 0
+    # Выстрелы одной партии идут по очереди, даже если клиент прислал
+    # их подряд, не дожидаясь ответа
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+def dump_board(board: Board) -> Dict[str, Any]:
+    return {
+        'width': board.width,
+        'height': board.height,
+        'cells': board.cells,
+        'balls': board.ball_count,
+        'departure_x': board.departure.x,
+        'score': board.score,
+        'swarm': board.swarm,
+    }
+
+
+def load_board(data: Any) -> Board:
+    try:
+        rows = data['cells']
+        if len(rows) > SERVICE_MAX_HEIGHT or any(
+            len(row) > SERVICE_MAX_WIDTH for row in rows
+        ):
+            raise ServiceError(
+                f'Поле больше {SERVICE_MAX_WIDTH}x{SERVICE_MAX_HEIGHT}'
+            )
+
+        cells = [
+            [None if cell is None else int(cell) for cell in row]
+            for row in rows
+        ]
+        ball_count = int(data['balls'])
+        departure_x = data.get('departure_x')
+        if departure_x is not None:
+            departure_x = float(departure_x)
+        score = int(data.get('score', 0))
+        swarm = bool(data.get('swarm', False))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ServiceError('Неверное описание поля') from None
+
+    if not cells or not cells[0] or any(
+        len(row) != len(cells[0]) for row in cells
+    ):
+        raise ServiceError('Поле должно быть непустым прямоугольником')
+
+    if not 1 <= ball_count <= SERVICE_MAX_BALLS:
+        raise ServiceError(f'Шариков должно быть от 1 до {SERVICE_MAX_BALLS}')
+
+    if any(
+        cell is not None and not 1 <= cell <= SERVICE_MAX_NUMBER
+        for row in cells
+        for cell in row
+    ):
+        raise ServiceError(
+            f'Прочность блоков должна быть от 1 до {SERVICE_MAX_NUMBER}'
+        )
+
+    if not 0 <= score <= SERVICE_MAX_SCORE:
+        raise ServiceError(f'Счёт должен быть от 0 до {SERVICE_MAX_SCORE}')
+
+    # Шарик вылетает из точки departure_x, и он целиком должен быть
+    # между стенами
+    right = len(cells[0]) * BLOCK_SIZE - BALL_RADIUS
+    if departure_x is not None and not (
+        isfinite(departure_x) and BALL_RADIUS <= departure_x <= right
+    ):
+        raise ServiceError(
+            f'Точка вылета должна быть от {BALL_RADIUS} до {right}'
+        )
+
+    return Board(cells, ball_count, departure_x, score, swarm)
+
+
+def run_shot(
+    data: bytes, angle: float, engine: str, deadline: float = inf
+) -> Tuple[bytes, Optional[int], Dict[str, int], List[Dict[str, Any]]]:
+    """Ход в процессе-работнике: доска приходит и уходит упакованной.
+
+    Ход разыгрывается здесь, а не через simulate_shot, чтобы сравнить
+    блоки до того, как finish опустит их на ряд. Срок сверяется с
+    time(), общими часами сервиса и работников.
+    """
+    board = unpack_board(data)
+    shot = ENGINES[engine](board.copy(), angle)
+
+    while not shot.step():
+        if time() >= deadline:
+            raise TimeoutError
+
+    events = []
+    for y, (before, after) in enumerate(zip(board.cells, shot.board.cells)):
+        for x, (old, new) in enumerate(zip(before, after)):
+            if old == new:
+                continue
+
+            if new is None:
+                events.append({'type': 'destroyed', 'x': x, 'y': y})
+            else:
+                events.append({'type': 'hit', 'x': x, 'y': y, 'number': new})
+
+    code = shot.finish()
+    turn = {
+        'score': shot.score,
+        'damage': shot.damage,
+        'destroyed': shot.destroyed,
+        'ticks': shot.ticks,
+        'balls': shot.spawned,
+    }
+
+    return pack_board(shot.board), code, turn, events
+
+
+class Connection:
+    """Один клиент: его партии, очередь запросов и запись ответов.
+
+    Партии хранятся в соединении и видны только ему, а работникам
+    уходит лишь упакованная доска, поэтому клиенты ничего не делят.
+    """
+
+    def __init__(
+        self,
+        service: 'SimulationService',
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        self.service = service
+        self.reader = reader
+        self.writer = writer
+
+        self.sessions: Dict[int, Session] = {}
+        self.slots = asyncio.Semaphore(SERVICE_PIPELINE)
+        self.write_lock = asyncio.Lock()
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        try:
+            while True:
+                try:
+                    line = await self.reader.readline()
+                except ValueError:
+                    await self.send(
+                        {'ok': False, 'error': 'Слишком длинная строка'}
+                    )
+                    break
+
+                if not line:
+                    break
+
+                await self.slots.acquire()
+                task = asyncio.create_task(self.serve(line))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+            # Ответы на уже прочитанные запросы дописываются
+            if self.tasks:
+                await asyncio.gather(*self.tasks)
+        except ConnectionError:
+            pass
+        finally:
+            self.writer.close()
+
+    async def serve(self, line: bytes) -> None:
+        try:
+            await self.send(await self.respond(line))
+        finally:
+            self.slots.release()
+
+    async def respond(self, line: bytes) -> Dict[str, Any]:
+        request_id = None
+
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                raise ServiceError('Запрос должен быть строкой JSON') from None
+
+            if not isinstance(request, dict):
+                raise ServiceError('Запрос должен быть объектом JSON')
+
+            request_id = request.get('id')
+            response = {'ok': True, **await self.dispatch(request)}
+        except ServiceError as error:
+            response = {'ok': False, 'error': str(error)}
+        except Exception as error:
+            # Сбой работника или упаковки доски не должен оставить
+            # клиента без ответа и обрывать остальные его запросы
+            response = {
+                'ok': False,
+                'error': f'Внутренняя ошибка: {type(error).__name__}: '
+                f'{error}',
+            }
+
+        # id возвращается как есть, чтобы клиент сопоставил ответы,
+        # которые приходят не в порядке запросов
+        if request_id is not None:
+            response = {'id': request_id, **response}
+
+        return response
+
+    async def send(self, response: Dict[str, Any]) -> None:
+        async with self.write_lock:
+            self.writer.write(
+                json.dumps(response, ensure_ascii=False).encode() + b'\n'
+            )
+            await self.writer.drain()
+
+    async def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        operation = request.get('op')
+
+        if operation == 'load':
+            return self.load(request)
+        if operation == 'board':
+            session_id, session = self.get_session(request)
+            return {
+                'session': session_id,
+                'board': dump_board(session.board),
+                'code': CODE_NAMES.get(session.code),
+                'turns': session.turns,
+            }
+        if operation == 'shot':
+            return await self.shot(request)
+        if operation == 'close':
+            session_id, _ = self.get_session(request)
+            del self.sessions[session_id]
+            return {'session': session_id}
+
+        raise ServiceError(f'Неизвестная операция: {operation}')
+
+    def get_session(self, request: Dict[str, Any]) -> Tuple[int, Session]:
+        session_id = request.get('session')
+        if not isinstance(session_id, int) or session_id not in self.sessions:
+            raise ServiceError(f'Нет такой партии: {session_id}')
+
+        return session_id, self.sessions[session_id]
+
+    def load(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if len(self.sessions) >= SERVICE_MAX_SESSIONS:
+            raise ServiceError('Слишком много открытых партий')
+
+        engine = request.get('engine', SERVICE_ENGINE)
+        if engine not in ENGINES:
+            raise ServiceError(f'Неизвестный движок: {engine}')
+
+        if 'board' in request:
+            board = load_board(request['board'])
+        else:
+            level = request.get('level')
+            if not isinstance(level, int) or not level_exist(level):
+                raise ServiceError(f'Нет такого уровня: {level}')
+
+            board = Board.from_level(*load_level(level))
+
+        session_id = next(self.service.session_ids)
+        self.sessions[session_id] = Session(board, engine)
+
+        return {'session': session_id, 'board': dump_board(board)}
+
+    async def shot(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        session_id, session = self.get_session(request)
+
+        angle = request.get('angle')
+        if (
+            not isinstance(angle, (int, float))
+            or isinstance(angle, bool)
+            or not isfinite(angle)
+        ):
+            raise ServiceError('Угол должен быть числом в радианах')
+
+        async with session.lock:
+            if session.code:
+                raise ServiceError('Партия уже закончена')
+
+            deadline = time() + SERVICE_SHOT_TIMEOUT
+            try:
+                data, code, turn, events = await asyncio.wait_for(
+                    self.service.run(
+                        run_shot,
+                        pack_board(session.board),
+                        angle,
+                        session.engine,
+                        deadline,
+                    ),
+                    SERVICE_SHOT_TIMEOUT,
+                )
+            except ValueError as error:
+                raise ServiceError(str(error)) from None
+            except (TimeoutError, asyncio.TimeoutError):
+                raise ServiceError(
+                    f'Ход не уложился в {SERVICE_SHOT_TIMEOUT:g} с'
+                ) from None
+
+            session.board = unpack_board(data)
+            session.code = code
+            session.turns += 1
+
+        return {
+            'session': session_id,
+            'code': CODE_NAMES.get(code),
+            'score': session.board.score,
+            'turn': turn,
+            'events': events,
+            'board': dump_board(session.board),
+        }
+
+
+class SimulationService:
+    """Правила игры по сети: строка JSON на запрос, строка на ответ.
+
+    Приём соединений и разбор запросов идут в asyncio, а ходы
+    разыгрываются в пуле процессов, чтобы занять все ядра.
+    """
+
+    def __init__(self, executor: Executor) -> None:
+        self.executor = executor
+        self.session_ids = count(1)
+
+    async def run(self, function: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await Connection(self, reader, writer).run()
+
+
+async def serve(
+    host: str = SERVICE_HOST,
+    port: int = SERVICE_PORT,
+    unix: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> None:
+    with ProcessPoolExecutor(
+        workers, mp_context=get_pool_context()
+    ) as executor:
+        service = SimulationService(executor)
+
+        if unix is not None:
+            server = await asyncio.start_unix_server(
+                service.handle, unix, limit=SERVICE_LINE_LIMIT
+            )
+            print(f'Сервис слушает {unix}')
+        else:
+            server = await asyncio.start_server(
+                service.handle, host, port, limit=SERVICE_LINE_LIMIT
+            )
+            print(f'Сервис слушает {host}:{port}')
+
+        async with server:
+            await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Правила игры для внешних ботов и инструментов'
+    )
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--unix', help='путь к Unix-сокету вместо TCP')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,546 @@
+import pygame
+
+from math import atan2, cos, sin
+from os import path
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Type, TypeVar, Union
+
+from levelpack import Level, LevelPack, read_text_level
+
+# КОНФИГУРАЦИЯ #
+DEFAULT_FPS = 240
+# Физика идёт фиксированными тиками, один тик — один кадр при DEFAULT_FPS
+TICK_RATE = DEFAULT_FPS
+
+BLOCK_SIZE = 40
+BLOCK_KILL_NUMBER = 0
+
+BALL_RADIUS = 5
+BALL_SPEED = 1
+BALL_DAMAGE = 1
+
+# Шарики вылетают раз в 100 мс игрового времени
+BALL_SPAWN_TICKS = TICK_RATE // 10
+# На уровнях-«роях» (* после числа шариков) шарики идут сплошным потоком
+SWARM_SPAWN_TICKS = 1
+# Упавший шарик съезжает к точке остановки на пиксель за тик, но не
+# дольше полсекунды, чтобы на широком поле сбор не затягивал ход
+GATHER_TICKS = TICK_RATE // 2
+
+# Минимальное расстояние от прицела до ограничивающей линии
+AIM_MARGIN = 20
+
+LEVEL_PATH = 'App/levels/level_{}.txt'
+# Собирается из текстовых уровней командой python levelpack.py
+LEVEL_PACK_PATH = 'App/levels.pack'
+# ============ #
+
+T = TypeVar('T')
+
+
+@dataclass
+class Point:
+    x: Union[int, float]
+    y: Union[int, float]
+
+
+@dataclass
+class GameCodes:
+    win: int = 1
+    game_over: int = 2
+    play: int = 3
+    main_menu: int = 4
+    again: int = 5
+    exit: int = -1
+
+
+@dataclass
+class BallStates:
+    flying: int = 0
+    # Коснулся линии в этом тике, точка остановки уже известна
+    landed: int = 1
+    gathering: int = 2
+    done: int = 3
+
+
+@lru_cache(maxsize=None)
+def get_level_pack() -> Optional[LevelPack]:
+    if not path.exists(LEVEL_PACK_PATH):
+        return None
+
+    return LevelPack(LEVEL_PACK_PATH)
+
+
+def level_exist(number: int) -> bool:
+    pack = get_level_pack()
+    if pack is not None and number in pack:
+        return True
+
+    return path.exists(LEVEL_PATH.format(number))
+
+
+def load_level(number: Union[int, str]) -> Level:
+    """Уровень из набора, а если его там нет — из текстового файла.
+
+    Текстовый файл, изменённый позже набора, важнее набора: правка
+    уровня видна сразу, не дожидаясь пересборки.
+    """
+    file_name = LEVEL_PATH.format(number)
+    pack = get_level_pack()
+
+    if (
+        pack is not None
+        and str(number).isdigit()
+        and int(number) in pack
+        and not (
+            path.exists(file_name)
+            and path.getmtime(file_name) > path.getmtime(LEVEL_PACK_PATH)
+        )
+    ):
+        return pack.load(int(number))
+
+    return read_text_level(file_name)
+
+
+def get_line_top(height: int) -> int:
+    return height * BLOCK_SIZE + BLOCK_SIZE // 2
+
+
+def get_gather_ticks(distance: int) -> int:
+    """За сколько тиков шарик съедет к точке остановки."""
+    return min(abs(distance), GATHER_TICKS)
+
+
+def get_gather_x(start: int, stop: int, tick: int, ticks: int) -> int:
+    """Центр съезжающего шарика на тике tick из ticks."""
+    return start + (stop - start) * tick // ticks
+
+
+def get_block_sides(rect: pygame.Rect) -> Dict[str, pygame.Rect]:
+    return dict(
+        left=pygame.Rect(rect.left - 1, rect.top, 1, rect.height),
+        right=pygame.Rect(rect.right, rect.top, 1, rect.height),
+        top=pygame.Rect(rect.left, rect.top - 1, rect.width, 1),
+        bottom=pygame.Rect(rect.left, rect.bottom, rect.width, 1),
+    )
+
+
+def find_in_grid(
+    grid: List[List[Optional[T]]], rect: pygame.Rect, row_offset: int = 0
+) -> Optional[T]:
+    """Первый объект в ячейках под rect в том же порядке, что у Group.
+
+    Строка y сетки лежит на экране в строке y + row_offset.
+    """
+    height, width = len(grid), len(grid[0])
+
+    left = max(rect.left // BLOCK_SIZE, 0)
+    right = min((rect.right - 1) // BLOCK_SIZE, width - 1)
+    top = max(rect.top // BLOCK_SIZE - row_offset, 0)
+    bottom = min((rect.bottom - 1) // BLOCK_SIZE - row_offset, height - 1)
+
+    for y in range(top, bottom + 1):
+        row = grid[y]
+        for x in range(left, right + 1):
+            if row[x] is not None:
+                return row[x]
+
+    return None
+
+
+def damage_block(number: int, damage: int) -> Tuple[int, int, bool]:
+    """Возвращает новую прочность блока, полученные очки и разрушен ли он."""
+    number -= damage
+    score = damage * 2
+
+    killed = number <= BLOCK_KILL_NUMBER
+    if killed:
+        score += damage * 10
+
+    return number, score, killed
+
+
+def get_aim_angle(
+    departure: pygame.math.Vector2, target: Tuple[int, int], line_top: int
+) -> float:
+    x, y = target[0] + BALL_RADIUS, target[1] + BALL_RADIUS
+
+    if y > line_top - AIM_MARGIN:
+        y = line_top - AIM_MARGIN
+
+    return atan2(y - departure.y, x - departure.x)
+
+
+def get_shot_speed(angle: float) -> pygame.math.Vector2:
+    return pygame.math.Vector2(cos(angle), sin(angle)) * BALL_SPEED
+
+
+def bounce_off_walls(
+    rect: pygame.Rect, speed: pygame.math.Vector2, width: int
+) -> None:
+    if rect.left <= 0 or rect.right >= width:
+        speed.x = -speed.x
+
+    if rect.top <= 0:
+        speed.y = -speed.y
+
+
+def bounce_off_block(
+    rect: pygame.Rect,
+    speed: pygame.math.Vector2,
+    block_rect: pygame.Rect,
+    sides: Dict[str, pygame.Rect],
+) -> None:
+    collisions = set(
+        side for side, line in sides.items() if rect.colliderect(line)
+    )
+
+    if (
+        {'left', 'right'} & collisions
+        and 'bottom' in collisions
+        and rect.centery > block_rect.bottom
+    ):
+        if speed.y <= 0:
+            speed.y = -speed.y
+        else:
+            speed.x = -speed.x
+
+    elif (
+        {'left', 'right'} & collisions
+        and 'top' in collisions
+        and rect.centery < block_rect.top
+    ):
+        if speed.y >= 0:
+            speed.y = -speed.y
+        else:
+            speed.x = -speed.x
+
+    elif (
+        {'top', 'bottom'} & collisions
+        and 'left' in collisions
+        and rect.centerx < block_rect.left
+    ):
+        if speed.x >= 0:
+            speed.x = -speed.x
+        else:
+            speed.y = -speed.y
+
+    elif (
+        {'top', 'bottom'} & collisions
+        and 'right' in collisions
+        and rect.centery > block_rect.right
+    ):
+        if speed.x <= 0:
+            speed.x = -speed.x
+        else:
+            speed.y = -speed.y
+
+    elif {'top', 'bottom'} & collisions:
+        speed.y = -speed.y
+
+    else:
+        speed.x = -speed.x
+
+
+class Board:
+    def __init__(
+        self,
+        cells: List[List[Optional[int]]],
+        ball_count: int,
+        departure_x: Optional[float] = None,
+        score: int = 0,
+        swarm: bool = False,
+    ) -> None:
+        self.cells = cells
+        self.width = len(cells[0])
+        self.height = len(cells)
+
+        self.ball_count = ball_count
+        self.score = score
+        self.swarm = swarm
+
+        if departure_x is None:
+            departure_x = self.pixel_width / 2
+
+        self.departure = pygame.math.Vector2(
+            departure_x, self.line_top - BALL_RADIUS
+        )
+
+    @classmethod
+    def from_level(
+        cls, level: List[List[str]], ball_count: int, swarm: bool = False
+    ) -> 'Board':
+        return cls(
+            [
+                [int(symbol) if symbol.isdigit() else None for symbol in row]
+                for row in level
+            ],
+            ball_count,
+            swarm=swarm,
+        )
+
+    @property
+    def pixel_width(self) -> int:
+        return self.width * BLOCK_SIZE
+
+    @property
+    def line_top(self) -> int:
+        return get_line_top(self.height)
+
+    @property
+    def spawn_ticks(self) -> int:
+        return SWARM_SPAWN_TICKS if self.swarm else BALL_SPAWN_TICKS
+
+    def copy(self) -> 'Board':
+        return Board(
+            [row[:] for row in self.cells],
+            self.ball_count,
+            self.departure.x,
+            self.score,
+            self.swarm,
+        )
+
+    def block_count(self) -> int:
+        return sum(cell is not None for row in self.cells for cell in row)
+
+    def rows_left(self) -> int:
+        """Сколько ходов блоки могут опускаться, не задев линию."""
+        for y in range(self.height - 1, -1, -1):
+            if any(cell is not None for cell in self.cells[y]):
+                return self.height - 1 - y
+
+        return self.height
+
+    def advance(self) -> bool:
+        """Опускает блоки на ряд вниз, True — блок пересёк линию."""
+        crossed = any(cell is not None for cell in self.cells[-1])
+
+        self.cells.pop()
+        self.cells.insert(0, [None] * self.width)
+
+        return crossed
+
+
+class SimBlock:
+    def __init__(self, pos_x: int, pos_y: int, number: int) -> None:
+        self.pos_x = pos_x
+        self.pos_y = pos_y
+        self.number = number
+
+        self.rect = pygame.Rect(
+            BLOCK_SIZE * pos_x, BLOCK_SIZE * pos_y, BLOCK_SIZE, BLOCK_SIZE
+        )
+        self.sides = get_block_sides(self.rect)
+
+
+class SimBall:
+    def __init__(
+        self,
+        position: pygame.math.Vector2,
+        speed: pygame.math.Vector2,
+        damage: int = BALL_DAMAGE,
+    ) -> None:
+        self.position = position
+        self.speed = speed
+        self.damage = damage
+
+        self.state = BallStates.flying
+        self.gather_from = 0
+        self.gather_tick = 0
+        self.gather_ticks = 0
+
+        self.rect = pygame.Rect(
+            self.position.x - BALL_RADIUS,
+            self.position.y - BALL_RADIUS,
+            2 * BALL_RADIUS,
+            2 * BALL_RADIUS,
+        )
+
+    def update(self, shot: 'Shot') -> None:
+        if self.state == BallStates.flying:
+            self.fly(shot)
+
+        if self.state == BallStates.landed:
+            self.gather_from = self.rect.centerx
+            self.gather_ticks = get_gather_ticks(
+                shot.stop_point.x - self.rect.centerx
+            )
+
+            if self.gather_ticks:
+                self.state = BallStates.gathering
+            else:
+                self.state = BallStates.done
+                shot.done += 1
+
+        if self.state == BallStates.gathering:
+            self.gather_tick += 1
+            self.rect.centerx = get_gather_x(
+                self.gather_from,
+                shot.stop_point.x,
+                self.gather_tick,
+                self.gather_ticks,
+            )
+
+            if self.gather_tick == self.gather_ticks:
+                self.state = BallStates.done
+                shot.done += 1
+
+    def fly(self, shot: 'Shot') -> None:
+        self.position += self.speed
+
+        self.rect.centerx = self.position.x
+        self.rect.centery = self.position.y
+
+        if self.rect.bottom >= shot.line_top:
+            self.state = BallStates.landed
+            self.speed = pygame.math.Vector2(0)
+            self.rect.bottom = shot.line_top
+
+            if shot.stop_point is None:
+                shot.stop_point = Point(*self.rect.center)
+
+            return None
+
+        bounce_off_walls(self.rect, self.speed, shot.width)
+
+        block = shot.find_block(self.rect)
+
+        if not block:
+            return None
+
+        shot.hit(block, self.damage)
+        bounce_off_block(self.rect, self.speed, block.rect, block.sides)
+
+
+@dataclass
+class ShotResult:
+    board: Board
+    code: Optional[int]
+    score: int
+    damage: int
+    destroyed: int
+    ticks: int
+    # Сколько шариков успело вылететь
+    balls: int
+
+
+class Shot:
+    """Один ход: полёт всех шариков до их сбора в точке остановки."""
+
+    # Урон шарика за касание; движки берут его отсюда, а не из константы
+    ball_damage = BALL_DAMAGE
+
+    def __init__(self, board: Board, angle: float) -> None:
+        if sin(angle) >= 0:
+            raise ValueError('Выстрел должен быть направлен вверх')
+
+        self.board = board
+        self.angle = angle
+
+        self.width = board.pixel_width
+        self.line_top = board.line_top
+
+        self.grid = [
+            [
+                None if number is None else SimBlock(x, y, number)
+                for x, number in enumerate(row)
+            ]
+            for y, row in enumerate(board.cells)
+        ]
+        self.block_count = board.block_count()
+        self.balls: List[SimBall] = []
+        self.spawned = 0
+        # Сколько шариков уже собрано в точке остановки
+        self.done = 0
+
+        self.stop_point: Optional[Point] = None
+        self.ticks = 0
+        self.next_spawn = 0
+
+        self.score = 0
+        self.damage = 0
+        self.destroyed = 0
+
+    def new_ball(self) -> SimBall:
+        """Шарик в точке вылета, ещё не сделавший ни одного тика."""
+        departure = self.board.departure
+
+        return SimBall(
+            pygame.math.Vector2(departure.x - BALL_RADIUS, departure.y),
+            get_shot_speed(self.angle),
+            self.ball_damage,
+        )
+
+    def find_block(self, rect: pygame.Rect) -> Optional[SimBlock]:
+        return find_in_grid(self.grid, rect)
+
+    def hit(self, block: SimBlock, damage: int) -> None:
+        block.number, score, killed = damage_block(block.number, damage)
+
+        self.score += score
+        self.damage += damage
+
+        if killed:
+            self.destroyed += 1
+            self.block_count -= 1
+            self.grid[block.pos_y][block.pos_x] = None
+            self.board.cells[block.pos_y][block.pos_x] = None
+        else:
+            self.board.cells[block.pos_y][block.pos_x] = block.number
+
+    def is_finished(self) -> bool:
+        return bool(self.balls) and self.done == len(self.balls)
+
+    def step(self) -> bool:
+        """Один кадр игры, True — все шарики собраны."""
+        if len(self.balls) < self.board.ball_count:
+            if self.ticks >= self.next_spawn:
+                self.balls.append(self.new_ball())
+                self.spawned += 1
+                self.next_spawn = self.ticks + self.board.spawn_ticks
+
+        if self.is_finished():
+            return True
+
+        for ball in self.balls:
+            ball.update(self)
+
+        self.ticks += 1
+        return False
+
+    def finish(self) -> Optional[int]:
+        board = self.board
+        board.score += self.score
+
+        if not self.block_count:
+            return GameCodes.win
+
+        board.departure = pygame.math.Vector2(
+            self.stop_point.x, self.stop_point.y
+        )
+
+        if board.advance():
+            return GameCodes.game_over
+
+
+def simulate_shot(
+    board: Board, angle: float, engine: Type[Shot] = Shot
+) -> ShotResult:
+    """Разыгрывает ход без экрана и звука, исходная доска не меняется."""
+    shot = engine(board.copy(), angle)
+
+    while not shot.step():
+        pass
+
+    code = shot.finish()
+
+    return ShotResult(
+        shot.board,
+        code,
+        shot.score,
+        shot.damage,
+        shot.destroyed,
+        shot.ticks,
+        shot.spawned,
+    )
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Тесты идут без окна и звука, а уровни и сохранения ищутся от корня
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
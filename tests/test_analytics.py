@@ -0,0 +1,20 @@
+from analytics import STRATEGIES, analyze, estimate_time, get_levels
+
+
+def test_report_does_not_depend_on_workers() -> None:
+    levels = {4: get_levels('App/levels')[4]}
+    strategies = list(STRATEGIES)
+
+    report = analyze(levels, strategies, games=2, workers=1)
+    assert analyze(levels, strategies, games=2, workers=2) == report
+
+    for strategy in strategies:
+        stats = report['level_4'][strategy]
+        assert stats['games'] == 2
+        assert 0 <= stats['win_rate'] <= 1
+
+
+def test_estimate_time_scales_with_games() -> None:
+    levels = {4: get_levels('App/levels')[4]}
+
+    assert estimate_time(levels, ['random'], games=10, workers=1) > 0
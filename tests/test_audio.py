@@ -0,0 +1,29 @@
+import PyBall
+from audio import SoundDispatcher
+
+
+def test_repeats_get_louder_up_to_full_volume() -> None:
+    audio = SoundDispatcher(
+        PyBall.SOUND_CHANNELS,
+        PyBall.SOUND_RESERVED_CHANNELS,
+        PyBall.SOUND_VOICES,
+        PyBall.SOUND_VOLUME,
+        PyBall.SOUND_STACK_GAIN,
+    )
+    volumes = [audio.get_volume(count) for count in (1, 2, 4, 8, 64)]
+
+    assert volumes[0] == PyBall.SOUND_VOLUME < 1.0
+    assert volumes == sorted(volumes)
+    assert volumes[1] > volumes[0]
+    assert volumes[-1] == 1.0
+
+
+def test_flush_clears_requests() -> None:
+    audio = SoundDispatcher(4, 1, 2, 0.5, 0.25)
+    audio.play(PyBall.SHOOT_SOUND)
+    audio.play(PyBall.SHOOT_SOUND)
+    audio.play(PyBall.CONTINUE_SOUND, important=True)
+
+    assert audio.requests[PyBall.SHOOT_SOUND] == 2
+    audio.flush()
+    assert not audio.requests and not audio.important
@@ -0,0 +1,34 @@
+from benchmark import REGRESSION_NOISE_MS, compare, summarize
+from profiler import percentile
+
+
+def test_summarize() -> None:
+    stats = summarize([0.003, 0.001, 0.002])
+
+    assert stats['median_ms'] == 2.0
+    assert stats['max_ms'] == 3.0
+    assert stats['count'] == 3
+    assert summarize([])['count'] == 0
+
+
+def test_compare_reports_only_real_regressions() -> None:
+    slow = 10 + 2 * REGRESSION_NOISE_MS
+    baseline = {
+        'game': {'frame': {'median_ms': 5.0}, 'flip': {'median_ms': 0.001}}
+    }
+    results = {
+        'game': {'frame': {'median_ms': slow}, 'flip': {'median_ms': 0.002}}
+    }
+
+    regressions = compare(results, baseline, threshold=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith('game.frame')
+
+
+def test_percentile() -> None:
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 0.5) == 51
+    assert percentile(values, 0.99) == 100
+    assert percentile([], 0.5) == 0.0
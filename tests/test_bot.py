@@ -0,0 +1,63 @@
+from concurrent.futures import Future
+from time import perf_counter
+
+import pytest
+
+from bot import Bot, Search, pack_board, rate_angles, unpack_board
+from simulation import Board, load_level
+from trajectory import EventShot
+
+
+def finished(value=None, error=None) -> Future:
+    future = Future()
+    if error is None:
+        future.set_result(value)
+    else:
+        future.set_exception(error)
+
+    return future
+
+
+def test_board_round_trip() -> None:
+    board = Board.from_level(*load_level(1))
+    copy = unpack_board(pack_board(board))
+
+    assert copy.cells == board.cells
+    assert copy.departure == board.departure
+    assert (copy.ball_count, copy.score, copy.swarm) == (
+        board.ball_count,
+        board.score,
+        board.swarm,
+    )
+
+
+def test_search_waits_for_pending_chunks() -> None:
+    data = pack_board(Board.from_level(*load_level(1)))
+    candidates = rate_angles(data, [-1.0], EventShot)
+    search = Search([finished(candidates), Future()], 2, budget=60)
+
+    assert not search.done()
+    with pytest.raises(RuntimeError):
+        search.result()
+
+
+def test_failed_chunk_drops_search() -> None:
+    error = ValueError('сбой работника')
+    search = Search([finished(error=error), Future()], 2, budget=60)
+
+    started = perf_counter()
+    assert search.done()
+    assert search.failed() is error
+    with pytest.raises(ValueError):
+        search.result()
+    assert perf_counter() - started < 1
+
+
+def test_bot_plays_first_shot() -> None:
+    board = Board.from_level(*load_level(1))
+
+    with Bot(workers=1, candidates=8, budget=5) as bot:
+        assert bot.workers == 1
+        result = bot.best_shot(board)
+
+    assert result.evaluated == result.total == 8
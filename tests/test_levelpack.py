@@ -0,0 +1,57 @@
+import pytest
+
+from levelpack import (
+    PACK_HEADER,
+    PACK_MAGIC,
+    LevelPack,
+    parse_ball_line,
+    read_text_level,
+    read_text_levels,
+    write_level_pack,
+)
+
+
+def test_parse_ball_line() -> None:
+    assert parse_ball_line('50\n') == (50, False)
+    assert parse_ball_line('5000*\n') == (5000, True)
+
+
+def test_swarm_level_round_trip(tmp_path) -> None:
+    level_file = tmp_path / 'level_7.txt'
+    level_file.write_text('1| |12\n | |3\n5000*\n')
+    levels = read_text_levels(str(tmp_path))
+    assert levels == {7: ([['1', ' ', '12'], [' ', ' ', '3']], 5000, True)}
+
+    pack_file = str(tmp_path / 'levels.pack')
+    write_level_pack(pack_file, {**levels, 9: read_text_level(level_file)})
+
+    pack = LevelPack(pack_file)
+    try:
+        assert list(pack) == [7, 9]
+        assert 8 not in pack
+        assert pack.load(7) == levels[7]
+        assert pack.load_cells(9) == (
+            [[1, None, 12], [None, None, 3]],
+            5000,
+            True,
+        )
+    finally:
+        pack.close()
+
+
+def test_old_pack_version_is_rejected(tmp_path) -> None:
+    pack_file = tmp_path / 'levels.pack'
+    pack_file.write_bytes(PACK_HEADER.pack(PACK_MAGIC, 1, 1, 0))
+
+    with pytest.raises(ValueError):
+        LevelPack(str(pack_file))
+
+
+def test_shipped_pack_matches_text_levels() -> None:
+    pack = LevelPack('App/levels.pack')
+    try:
+        assert {number: pack.load(number) for number in pack} == (
+            read_text_levels('App/levels')
+        )
+    finally:
+        pack.close()
@@ -0,0 +1,23 @@
+import pytest
+
+from replay import Replay
+
+
+def test_replay_file_round_trip(tmp_path) -> None:
+    replay = Replay(3, seed=2 ** 40)
+    replay.add(1500, -1.2345678901234567, (120, 80))
+    replay.add(4000.7, -2.0)
+
+    file_name = str(tmp_path / 'replays' / 'game.replay')
+    replay.save(file_name)
+    loaded = Replay.load(file_name)
+
+    assert loaded == Replay(3, 2 ** 40, replay.shots)
+    assert loaded.shots[0].angle == -1.2345678901234567
+    assert loaded.shots[1].time == 4000
+
+
+def test_foreign_file_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        Replay.from_bytes(b'PNG!' + bytes(64))
+
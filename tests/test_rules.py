@@ -0,0 +1,267 @@
+from math import radians
+from typing import List, Optional, Tuple
+
+import pytest
+
+import PyBall
+from bot import get_candidate_angles, rate_shot
+from replay import Replay, play_headless
+from simulation import (
+    Board,
+    GameCodes,
+    Shot,
+    level_exist,
+    load_level,
+    simulate_shot,
+)
+from trajectory import EventShot, trace_path
+from vectorized import NUMPY_AVAILABLE, VectorShot
+
+LEVELS = [number for number in range(1, 5) if level_exist(number)]
+ANGLES = [radians(degrees) for degrees in (-30, -100, -150, -60, -91, -170)]
+# Кадр игры при 60 FPS
+FRAME_MS = 1000 // 60
+
+# После хода: клетки, x точки вылета, счёт, тики хода и итог
+Turn = Tuple[List[List[Optional[int]]], float, int, int, Optional[int]]
+
+
+def play_game(level: int, angles: List[float], speed_mode: int) -> List[Turn]:
+    """Партия в игре: ходы идут кадрами через GameMap.update."""
+    PyBall.clear_sprites(PyBall.all_sprites)
+    game_map = PyBall.GameMap(*load_level(level))
+    turns = []
+
+    for angle in angles:
+        game_map.shoot(angle)
+        game_map.speed_mode = speed_mode
+
+        code = None
+        while game_map.is_shoot and not code:
+            code = game_map.update(FRAME_MS)
+
+        board = game_map.to_board()
+        turns.append(
+            (
+                board.cells,
+                board.departure.x,
+                board.score,
+                game_map.ticks,
+                code,
+            )
+        )
+        if code:
+            break
+
+    return turns
+
+
+def play_board(level: int, angles: List[float]) -> List[Turn]:
+    """Та же партия без экрана через simulate_shot."""
+    board = Board.from_level(*load_level(level))
+    turns = []
+
+    for angle in angles:
+        result = simulate_shot(board, angle)
+        board = result.board
+        turns.append(
+            (
+                board.cells,
+                board.departure.x,
+                board.score,
+                result.ticks,
+                result.code,
+            )
+        )
+        if result.code:
+            break
+
+    return turns
+
+
+def without_board(turns: List[Turn]) -> List[Turn]:
+    """В последнем ходе с итогом игра не опускает поле, как Board.
+
+    Поэтому у него сравниваются только тики и итог.
+    """
+    if turns and turns[-1][-1]:
+        turns = turns[:-1] + [(None, None, None) + turns[-1][3:]]
+
+    return turns
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_game_matches_shot(level: int) -> None:
+    speed_mode = len(PyBall.SPEED_MODES) - 1
+
+    assert without_board(play_game(level, ANGLES, speed_mode)) == (
+        without_board(play_board(level, ANGLES))
+    )
+
+
+@pytest.mark.parametrize('speed_mode', range(len(PyBall.SPEED_MODES) - 1))
+def test_speed_modes_match(speed_mode: int) -> None:
+    fastest = len(PyBall.SPEED_MODES) - 1
+
+    assert play_game(1, ANGLES[:2], speed_mode) == (
+        play_game(1, ANGLES[:2], fastest)
+    )
+
+
+def test_physics_budget_only_slows_the_shot(monkeypatch) -> None:
+    """Физика, не уложившаяся в PHYSICS_BUDGET, доигрывается позже."""
+    fastest = len(PyBall.SPEED_MODES) - 1
+    expected = play_game(1, ANGLES[:2], fastest)
+
+    monkeypatch.setattr(PyBall, 'PHYSICS_BUDGET', 0)
+    assert play_game(1, ANGLES[:2], fastest - 1) == expected
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason='нужен numpy')
+@pytest.mark.parametrize('level', LEVELS)
+def test_vector_shot_matches_shot(level: int) -> None:
+    board = Board.from_level(*load_level(level))
+
+    for angle in ANGLES:
+        shot = Shot(board.copy(), angle)
+        vector_shot = VectorShot(board.copy(), angle)
+
+        while True:
+            finished = shot.step()
+            assert vector_shot.step() == finished
+            assert vector_shot.ticks == shot.ticks
+            assert vector_shot.score == shot.score
+            assert vector_shot.board.cells == shot.board.cells
+            if finished:
+                break
+
+        code = shot.finish()
+        assert vector_shot.finish() == code
+        assert vector_shot.board.cells == shot.board.cells
+        assert vector_shot.board.departure == shot.board.departure
+        if code:
+            break
+
+        board = shot.board
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason='нужен numpy')
+def test_vector_shot_swarm_uses_ball_damage() -> None:
+    class HeavyShot(Shot):
+        ball_damage = 3
+
+    class HeavyVectorShot(VectorShot):
+        ball_damage = 3
+
+    cells = [[7] * 8 for _ in range(3)] + [[None] * 8 for _ in range(6)]
+    board = Board(cells, 300, swarm=True)
+
+    expected = simulate_shot(board, -1.0, HeavyShot)
+    result = simulate_shot(board, -1.0, HeavyVectorShot)
+
+    assert expected.damage % 3 == 0
+    assert result.board.cells == expected.board.cells
+    assert (result.score, result.damage, result.ticks) == (
+        expected.score,
+        expected.damage,
+        expected.ticks,
+    )
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_replay_is_exact(level: int) -> None:
+    replay = Replay(level, seed=level)
+    for time, angle in enumerate(ANGLES):
+        replay.add(time * 1000, angle)
+
+    loaded = Replay.from_bytes(replay.to_bytes())
+    assert loaded == replay
+
+    expected = play_board(level, ANGLES)
+    result = play_headless(loaded)
+    assert result.turns == len(expected)
+    assert result.code == expected[-1][-1]
+    assert result.score == expected[-1][2]
+    assert result.board.cells == expected[-1][0]
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_event_shot_matches_shot(level: int) -> None:
+    board = Board.from_level(*load_level(level))
+
+    for degrees in range(-5, -180, -10):
+        angle = radians(degrees - 0.37)
+        expected = simulate_shot(board, angle, Shot)
+        result = simulate_shot(board, angle, EventShot)
+
+        assert result.board.cells == expected.board.cells
+        assert result.board.departure == expected.board.departure
+        assert (
+            result.code,
+            result.score,
+            result.damage,
+            result.destroyed,
+            result.ticks,
+            result.balls,
+        ) == (
+            expected.code,
+            expected.score,
+            expected.damage,
+            expected.destroyed,
+            expected.ticks,
+            expected.balls,
+        )
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_trace_path_lands_with_first_ball(level: int) -> None:
+    level_map, _, swarm = load_level(level)
+    board = Board.from_level(level_map, 1, swarm)
+
+    for angle in ANGLES:
+        result = simulate_shot(board, angle)
+        if result.code == GameCodes.win:
+            continue
+
+        path = trace_path(board, angle, 1000)
+        assert path[-1] == tuple(result.board.departure)
+
+
+def test_game_win_without_main() -> None:
+    """Победа через GameMap без main(): счёт попадает в game_save."""
+    board = Board.from_level(*load_level(1))
+    angles = []
+
+    while True:
+        angle = max(
+            get_candidate_angles(32),
+            key=lambda angle: rate_shot(
+                simulate_shot(board, angle, EventShot)
+            ),
+        )
+        result = simulate_shot(board, angle, EventShot)
+        angles.append(angle)
+        board = result.board
+        if result.code:
+            break
+
+    assert result.code == GameCodes.win
+
+    save = dict(PyBall.game_save)
+    turns = play_game(1, angles, len(PyBall.SPEED_MODES) - 1)
+
+    assert turns[-1][-1] == GameCodes.win
+    assert PyBall.game_save['last_level'] == save['last_level'] + 1
+    assert PyBall.game_save['score'] == save['score'] + result.board.score
+
+
+def test_find_static_above_the_level() -> None:
+    PyBall.clear_sprites(PyBall.all_sprites)
+    game_map = PyBall.GameMap(*load_level(1))
+    game_map.row_offset = 2
+
+    assert game_map.find_static(PyBall.pygame.Rect(0, 0, 40, 40)) == []
+    whole = PyBall.pygame.Rect(
+        0, 0, game_map.pixel_width, game_map.pixel_height
+    )
+    assert game_map.find_static(whole)
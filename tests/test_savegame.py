@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from savegame import SaveManager, record_level
+
+DEFAULTS = {'score': 0, 'last_level': 1}
+
+
+def test_save_round_trip(tmp_path) -> None:
+    save_path = str(tmp_path / 'Data' / 'game_save.data')
+    key_path = str(tmp_path / 'Data' / 'secret.key')
+
+    saves = SaveManager(save_path, key_path, DEFAULTS)
+    saves.start()
+    assert saves.wait() == DEFAULTS
+
+    data = {'score': 120, 'last_level': 3}
+    record_level(data, 2, True, 120, 4, {'angle': -1.0, 'score': 60})
+    saves.save(data)
+    saves.close()
+
+    saves = SaveManager(save_path, key_path, DEFAULTS)
+    saves.start()
+    assert saves.wait() == data
+    saves.close()
+
+
+def test_unreadable_key_falls_back_to_defaults(tmp_path, capsys) -> None:
+    # Каталог вместо файла ключа: чтение падает с OSError
+    key_path = tmp_path / 'secret.key'
+    key_path.mkdir()
+    save_path = str(tmp_path / 'game_save.data')
+
+    saves = SaveManager(save_path, str(key_path), DEFAULTS)
+    saves.start()
+    assert saves.wait() == DEFAULTS
+
+    saves.save({'score': 10, 'last_level': 2})
+    saves.flush()
+    saves.close()
+
+    assert not os.path.exists(save_path)
+    assert 'Не удалось прочитать сохранение' in capsys.readouterr().err
+
+
+def test_corrupted_save_starts_new_game(tmp_path) -> None:
+    save_path = tmp_path / 'game_save.data'
+    save_path.write_bytes(b'not a save')
+
+    saves = SaveManager(str(save_path), str(tmp_path / 'key'), DEFAULTS)
+    saves.start()
+    assert saves.wait() == DEFAULTS
+    saves.close()
+
+
+@pytest.mark.parametrize('won', [True, False])
+def test_record_level(won: bool) -> None:
+    data = dict(DEFAULTS)
+    record_level(data, 1, won, 50, 3, None)
+
+    record = data['history']['1']
+    assert record['plays'] == 1
+    assert record['wins'] == int(won)
+    assert record['best_turns'] == (3 if won else None)
@@ -0,0 +1,88 @@
+import json
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import service
+from service import Connection, SimulationService
+from simulation import Board, load_level, simulate_shot
+
+
+class BrokenService(SimulationService):
+    async def run(self, function, *args):
+        raise OSError('работник упал')
+
+
+def request(connection: Connection, **fields) -> dict:
+    line = json.dumps(fields).encode()
+    return asyncio.run(connection.respond(line))
+
+
+@pytest.fixture
+def connection():
+    with ThreadPoolExecutor(1) as executor:
+        yield Connection(SimulationService(executor), None, None)
+
+
+def test_shot_follows_game_rules(connection: Connection) -> None:
+    loaded = request(connection, id=7, op='load', level=1)
+    assert loaded['ok'] and loaded['id'] == 7
+
+    session = loaded['session']
+    shot = request(connection, op='shot', session=session, angle=-1.2)
+    expected = simulate_shot(Board.from_level(*load_level(1)), -1.2)
+
+    assert shot['ok']
+    assert shot['board']['cells'] == expected.board.cells
+    assert shot['score'] == expected.board.score
+
+
+@pytest.mark.parametrize(
+    'board',
+    [
+        {'cells': [[1] * 70000], 'balls': 1},
+        {'cells': [[1]], 'balls': 2 ** 33},
+        {'cells': [[1, None]], 'balls': 3, 'departure_x': -500},
+        {'cells': [[2 ** 40]], 'balls': 1},
+        {'cells': [[1], [1, 2]], 'balls': 1},
+    ],
+)
+def test_bad_board_is_refused(connection: Connection, board: dict) -> None:
+    response = request(connection, op='load', board=board)
+
+    assert not response['ok']
+    assert response['error']
+
+
+def test_worker_failure_gets_a_reply() -> None:
+    with ThreadPoolExecutor(1) as executor:
+        connection = Connection(BrokenService(executor), None, None)
+        session = request(connection, op='load', level=1)['session']
+        response = request(connection, op='shot', session=session, angle=-1)
+
+    assert not response['ok']
+    assert 'работник упал' in response['error']
+
+
+def test_slow_shot_times_out(connection: Connection, monkeypatch) -> None:
+    monkeypatch.setattr(service, 'SERVICE_SHOT_TIMEOUT', 0.05)
+    board = {
+        'cells': [[10 ** 6] * 50] + [[None] * 50] * 20,
+        'balls': 2000,
+        'swarm': True,
+    }
+    session = request(connection, op='load', board=board)['session']
+
+    response = request(connection, op='shot', session=session, angle=-1.0)
+    assert not response['ok']
+    assert 'не уложился' in response['error']
+
+    # Доска партии не изменилась, а работник уже свободен
+    state = request(connection, op='board', session=session)
+    assert state['turns'] == 0 and state['board']['score'] == 0
+
+    monkeypatch.setattr(service, 'SERVICE_SHOT_TIMEOUT', 10)
+    session = request(connection, op='load', level=4)['session']
+    assert request(connection, op='shot', session=session, angle=-1)['ok']
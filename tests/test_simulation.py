@@ -0,0 +1,94 @@
+import os
+
+import pygame
+import pytest
+
+import simulation
+from levelpack import read_text_levels, write_level_pack
+from simulation import (
+    BALL_RADIUS,
+    BLOCK_SIZE,
+    Board,
+    SimBlock,
+    bounce_off_block,
+    damage_block,
+    find_in_grid,
+    get_gather_ticks,
+)
+
+
+def ball_rect(center) -> pygame.Rect:
+    rect = pygame.Rect(0, 0, 2 * BALL_RADIUS, 2 * BALL_RADIUS)
+    rect.center = center
+    return rect
+
+
+def test_damage_block() -> None:
+    assert damage_block(3, 1) == (2, 2, False)
+    assert damage_block(1, 1) == (0, 12, True)
+
+
+def test_find_in_grid_takes_first_cell_in_row_order() -> None:
+    grid = [[None, 'a'], ['b', 'c']]
+    rect = pygame.Rect(BLOCK_SIZE - 5, BLOCK_SIZE - 5, 10, 10)
+
+    assert find_in_grid(grid, rect) == 'a'
+    assert find_in_grid(grid, rect, row_offset=2) is None
+    assert find_in_grid(grid, pygame.Rect(0, 0, 10, 10)) is None
+
+
+@pytest.mark.parametrize(
+    'center, speed, expected',
+    [
+        # Снизу в середину нижней грани: отскок по вертикали
+        ((60, 84), (0.3, -1), (0.3, 1)),
+        # Слева в середину левой грани: отскок по горизонтали
+        ((36, 60), (1, 0.3), (-1, 0.3)),
+    ],
+)
+def test_bounce_off_block_faces(center, speed, expected) -> None:
+    block = SimBlock(1, 1, 5)
+    speed = pygame.math.Vector2(speed)
+
+    bounce_off_block(ball_rect(center), speed, block.rect, block.sides)
+
+    assert tuple(speed) == expected
+
+
+def test_board_advance_and_rows_left() -> None:
+    board = Board([[1, None], [None, None], [None, None]], 10)
+
+    assert board.rows_left() == 2
+    assert not board.advance()
+    assert board.cells == [[None, None], [1, None], [None, None]]
+    assert not board.advance()
+    assert board.advance()
+
+
+def test_gather_is_bounded() -> None:
+    assert get_gather_ticks(-3) == 3
+    assert get_gather_ticks(10 ** 6) == simulation.GATHER_TICKS
+
+
+def test_newer_text_level_wins_over_pack(tmp_path, monkeypatch) -> None:
+    (tmp_path / 'level_1.txt').write_text('1|2\n |3\n10\n')
+    pack_file = str(tmp_path / 'levels.pack')
+    write_level_pack(pack_file, read_text_levels(str(tmp_path)))
+
+    monkeypatch.setattr(
+        simulation, 'LEVEL_PATH', str(tmp_path / 'level_{}.txt')
+    )
+    monkeypatch.setattr(simulation, 'LEVEL_PACK_PATH', pack_file)
+    simulation.get_level_pack.cache_clear()
+
+    try:
+        assert simulation.load_level(1)[1] == 10
+
+        (tmp_path / 'level_1.txt').write_text('1|2\n |3\n20\n')
+        stamp = os.path.getmtime(pack_file) + 10
+        os.utime(tmp_path / 'level_1.txt', (stamp, stamp))
+
+        assert simulation.load_level(1)[1] == 20
+    finally:
+        simulation.get_level_pack().close()
+        simulation.get_level_pack.cache_clear()
@@ -0,0 +1,18 @@
+import pygame
+
+from widgets import grid_layout
+
+
+def test_column_is_centered() -> None:
+    rects = grid_layout(100, 10, (40, 20), 3, spacing=(0, 5))
+
+    assert [rect.topleft for rect in rects] == [(80, 10), (80, 35), (80, 60)]
+
+
+def test_last_row_of_grid_is_centered_on_its_own() -> None:
+    rects = grid_layout(100, 0, (20, 20), 5, columns=3, spacing=(10, 10))
+
+    assert [rect.left for rect in rects[:3]] == [60, 90, 120]
+    assert [rect.left for rect in rects[3:]] == [75, 105]
+    assert all(rect.top == 30 for rect in rects[3:])
+    assert all(isinstance(rect, pygame.Rect) for rect in rects)
@@ -0,0 +1,298 @@
+import heapq
+
+from math import ceil, floor, inf
+from typing import List, Tuple
+
+import pygame
+
+from simulation import (
+    BALL_RADIUS,
+    BLOCK_SIZE,
+    BallStates,
+    Board,
+    Shot,
+    SimBall,
+    find_in_grid,
+)
+
+# Погрешность при сравнении координат с границами клеток
+EPSILON = 1e-9
+# Запас вокруг шарика при перелёте: rect в игре — округлённая позиция, и
+# его край может касаться препятствия, пока сама позиция ещё в пикселе
+# от него
+FREE_MARGIN = 2
+
+# Сколько событий разыгрывает один вызов EventShot.step: между вызовами
+# тот, кто ведёт ход, может проверить срок
+EVENTS_PER_STEP = 4096
+
+# Порядок событий одного тика, как в Shot.step: сначала вылет шарика,
+# потом шарики по очереди
+SPAWN, UPDATE = 0, 1
+
+
+def _time_to(distance: float, speed: float) -> float:
+    return max(distance / speed, 0.0) if speed else inf
+
+
+def find_contact(
+    grid: List[List[object]],
+    width: int,
+    line_top: int,
+    x: float,
+    y: float,
+    vx: float,
+    vy: float,
+    radius: float = BALL_RADIUS,
+) -> float:
+    """Через сколько тиков квадрат коснётся стены, линии или блока.
+
+    Квадрат со стороной 2 * radius летит из (x, y) со скоростью
+    (vx, vy). Вместо шагов по пикселю перебираются только границы
+    клеток, которые пересекает его передний край, поэтому при любой
+    скорости он не может пролететь сквозь блок. Блоки, которые квадрат
+    уже задевает, не учитываются.
+    """
+    height, columns = len(grid), len(grid[0])
+
+    if vx > 0:
+        limit = _time_to(width - radius - x, vx)
+    else:
+        limit = _time_to(radius - x, vx)
+
+    if vy < 0:
+        limit = min(limit, _time_to(radius - y, vy))
+    else:
+        limit = min(limit, _time_to(line_top - radius - y, vy))
+
+    step_x = 1 if vx > 0 else -1
+    step_y = 1 if vy > 0 else -1
+    edge_x = x + step_x * radius
+    edge_y = y + step_y * radius
+
+    if vx > 0:
+        line_x = (floor((edge_x - EPSILON) / BLOCK_SIZE) + 1) * BLOCK_SIZE
+    else:
+        line_x = (ceil((edge_x + EPSILON) / BLOCK_SIZE) - 1) * BLOCK_SIZE
+
+    if vy > 0:
+        line_y = (floor((edge_y - EPSILON) / BLOCK_SIZE) + 1) * BLOCK_SIZE
+    else:
+        line_y = (ceil((edge_y + EPSILON) / BLOCK_SIZE) - 1) * BLOCK_SIZE
+
+    def occupied(column: int, row: int) -> bool:
+        return (
+            0 <= row < height
+            and 0 <= column < columns
+            and grid[row][column] is not None
+        )
+
+    def span(low: float, high: float) -> range:
+        return range(
+            floor((low + EPSILON) / BLOCK_SIZE),
+            floor((high - EPSILON) / BLOCK_SIZE) + 1,
+        )
+
+    while True:
+        time_x = _time_to(line_x - edge_x, vx)
+        time_y = _time_to(line_y - edge_y, vy)
+        time = min(time_x, time_y)
+
+        if time > limit:
+            return limit
+
+        cross_x = time_x - time <= EPSILON
+        cross_y = time_y - time <= EPSILON
+
+        column = line_x // BLOCK_SIZE - (step_x < 0)
+        row = line_y // BLOCK_SIZE - (step_y < 0)
+
+        at_x, at_y = x + vx * time, y + vy * time
+
+        if cross_x and any(
+            occupied(column, r) for r in span(at_y - radius, at_y + radius)
+        ):
+            return time
+
+        if cross_y and any(
+            occupied(c, row) for c in span(at_x - radius, at_x + radius)
+        ):
+            return time
+
+        if cross_x and cross_y and occupied(column, row):
+            return time
+
+        if cross_x:
+            line_x += step_x * BLOCK_SIZE
+        if cross_y:
+            line_y += step_y * BLOCK_SIZE
+
+
+def free_ticks(shot: Shot, ball: SimBall) -> int:
+    """Сколько тиков шарик наверняка пролетит, ничего не задев.
+
+    Блоки за ход только исчезают, поэтому оценка остаётся верной,
+    даже если другие шарики тем временем разобьют блоки.
+    """
+    radius = BALL_RADIUS + FREE_MARGIN
+    x, y = ball.position
+
+    around = pygame.Rect(
+        floor(x - radius),
+        floor(y - radius),
+        ceil(2 * radius) + 1,
+        ceil(2 * radius) + 1,
+    )
+    if (
+        around.left <= 0
+        or around.top <= 0
+        or around.right >= shot.width
+        or around.bottom >= shot.line_top
+        or find_in_grid(shot.grid, around) is not None
+    ):
+        return 0
+
+    time = find_contact(
+        shot.grid,
+        shot.width,
+        shot.line_top,
+        x,
+        y,
+        ball.speed.x,
+        ball.speed.y,
+        radius,
+    )
+
+    return max(ceil(time) - 1, 0)
+
+
+def fly_free(ball: SimBall, ticks: int) -> None:
+    """ticks тиков полёта без касаний, сложение за сложением, как в fly.
+
+    Позиция копит ошибку округления так же, как при шагах по тикам,
+    поэтому дальше шарик летит бит в бит как в Shot.
+    """
+    x, y = ball.position
+    vx, vy = ball.speed
+
+    for _ in range(ticks):
+        x += vx
+        y += vy
+
+    ball.position.update(x, y)
+
+
+def trace_path(
+    board: Board, angle: float, bounces: int
+) -> List[Tuple[float, float]]:
+    """Точки первых bounces отскоков одного шарика по правилам игры.
+
+    Шарик летит как в Shot, с SimBall.fly и bounce_off_block, и бьёт
+    блоки, поэтому путь совпадает с первым шариком хода.
+    """
+    shot = Shot(board.copy(), angle)
+    ball = shot.new_ball()
+    points = [tuple(ball.position)]
+
+    while len(points) <= bounces:
+        ticks = free_ticks(shot, ball)
+        if ticks:
+            fly_free(ball, ticks)
+            continue
+
+        speed = pygame.math.Vector2(ball.speed)
+        ball.fly(shot)
+
+        if ball.state != BallStates.flying:
+            points.append(ball.rect.center)
+            break
+
+        if ball.speed != speed:
+            points.append(tuple(ball.position))
+
+    return points
+
+
+class EventShot(Shot):
+    """Ход по правилам Shot, в котором шарики перелетают пустоту разом.
+
+    Каждый тик шарика — событие в очереди по (тику, номеру шарика), как
+    порядок обхода в Shot.step. Если до ближайших стены, линии или
+    блока шарику лететь несколько тиков, они проходят одним событием
+    (free_ticks, fly_free), а рядом с препятствием шарик делает обычный
+    тик SimBall.update: отскок решает bounce_off_block, поэтому поле,
+    счёт и тики совпадают с Shot бит в бит. Собирание после приземления
+    не разыгрывается: тик, когда шарик соберётся, известен сразу.
+
+    step() разыгрывает до EVENTS_PER_STEP событий, а не один тик, так
+    что число вызовов не связано с Shot.
+    """
+
+    def __init__(self, board: Board, angle: float) -> None:
+        super().__init__(board, angle)
+
+        self.queue: List[Tuple[int, int, int]] = [(0, SPAWN, 0)]
+        self.landed = 0
+        self.last_done = -1
+        self.events = 0
+
+    def step(self) -> bool:
+        """Следующие EVENTS_PER_STEP событий, True — ход закончен."""
+        for _ in range(EVENTS_PER_STEP):
+            if not self.queue:
+                break
+
+            tick, phase, index = heapq.heappop(self.queue)
+
+            if phase == SPAWN:
+                if not self._spawn(tick, index):
+                    self.queue.clear()
+            else:
+                self._update(tick, index)
+        else:
+            if self.queue:
+                return False
+
+        self.ticks = self.last_done + 1
+        self.done = len(self.balls)
+        return True
+
+    def _spawn(self, tick: int, index: int) -> bool:
+        """Вылет шарика, False — все вылетевшие собраны раньше."""
+        if self.landed == len(self.balls) and self.last_done + 1 < tick:
+            return False
+
+        self.balls.append(self.new_ball())
+        self.spawned += 1
+
+        heapq.heappush(self.queue, (tick, UPDATE, index))
+        if index + 1 < self.board.ball_count:
+            heapq.heappush(
+                self.queue, (tick + self.board.spawn_ticks, SPAWN, index + 1)
+            )
+
+        return True
+
+    def _update(self, tick: int, index: int) -> None:
+        ball = self.balls[index]
+        self.events += 1
+
+        ticks = free_ticks(self, ball)
+        if ticks:
+            fly_free(ball, ticks)
+            heapq.heappush(self.queue, (tick + ticks, UPDATE, index))
+            return None
+
+        ball.update(self)
+
+        if ball.state == BallStates.flying:
+            heapq.heappush(self.queue, (tick + 1, UPDATE, index))
+            return None
+
+        # Шарик приземлился и уже сделал первый шаг к точке остановки
+        done = tick
+        if ball.state == BallStates.gathering:
+            done += ball.gather_ticks - 1
+
+        self.landed += 1
+        self.last_done = max(self.last_done, done)
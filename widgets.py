@@ -0,0 +1,147 @@
+import pygame
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+ColorValue = Union[pygame.Color, Tuple[int, int, int], str]
+
+
+@dataclass
+class ButtonStyle:
+    font: pygame.font.Font
+    text_color: ColorValue
+    color: ColorValue
+    hover_color: ColorValue
+
+
+class Label:
+    """Строка текста, которая рендерится заново только при смене значения.
+
+    Положение задаётся точкой привязки прямоугольника, например
+    'bottomright': так подпись у правого края растёт влево.
+    """
+
+    def __init__(
+        self,
+        font: pygame.font.Font,
+        color: ColorValue,
+        anchor: str,
+        pos: Tuple[int, int],
+    ) -> None:
+        self.font = font
+        self.color = color
+        self.anchor = anchor
+        self.pos = pos
+
+        self.text: Optional[str] = None
+        self.image = pygame.Surface((0, 0))
+        self.rect = pygame.Rect(pos, (0, 0))
+
+    def set(self, text: str) -> bool:
+        """True, если текст изменился и подпись отрендерена заново."""
+        if text == self.text:
+            return False
+
+        self.text = text
+        self.image = self.font.render(text, False, self.color)
+        self.rect = self.image.get_rect(**{self.anchor: self.pos})
+
+        return True
+
+    def draw(self, surface: pygame.surface.Surface) -> pygame.Rect:
+        return surface.blit(self.image, self.rect)
+
+
+class Button(pygame.sprite.Sprite):
+    """Кнопка, оба состояния которой отрисованы при создании.
+
+    Наведение мыши только подменяет картинку, текст заново не рендерится.
+    """
+
+    def __init__(
+        self,
+        rect: pygame.Rect,
+        text: str,
+        code: int,
+        style: ButtonStyle,
+        *groups: pygame.sprite.AbstractGroup,
+    ) -> None:
+        super().__init__(*groups)
+
+        self.rect = pygame.Rect(rect)
+        self.text = text
+        self.code = code
+
+        self.images = (
+            self._render(style, style.color),
+            self._render(style, style.hover_color),
+        )
+        self.hovered = False
+        self.image = self.images[self.hovered]
+
+    def _render(
+        self, style: ButtonStyle, color: ColorValue
+    ) -> pygame.surface.Surface:
+        image = pygame.Surface(self.rect.size).convert()
+        image.fill(color)
+
+        text_surface = style.font.render(self.text, True, style.text_color)
+        image.blit(
+            text_surface, text_surface.get_rect(center=image.get_rect().center)
+        )
+
+        return image
+
+    def set_hovered(self, hovered: bool) -> bool:
+        """True, если состояние сменилось и кнопку нужно перерисовать."""
+        if hovered == self.hovered:
+            return False
+
+        self.hovered = hovered
+        self.image = self.images[hovered]
+
+        return True
+
+    def check_hover(self, pos: Tuple[int, int]) -> bool:
+        return self.set_hovered(self.rect.collidepoint(pos))
+
+    def check_click(self, pos: Tuple[int, int]) -> Optional[int]:
+        if self.rect.collidepoint(pos):
+            return self.code
+
+        return None
+
+
+def grid_layout(
+    center_x: float,
+    top: float,
+    size: Tuple[int, int],
+    count: int,
+    columns: int = 1,
+    spacing: Tuple[float, float] = (0, 0),
+) -> List[pygame.Rect]:
+    """Прямоугольники для count виджетов размера size.
+
+    Виджеты идут рядами по columns штук сверху вниз, каждый ряд
+    выровнен по center_x. С columns=1 получается столбец кнопок меню, с
+    большим числом — сетка, например для выбора уровня.
+    """
+    width, height = size
+    gap_x, gap_y = spacing
+    rects = []
+
+    for i in range(count):
+        row, column = divmod(i, columns)
+        in_row = min(columns, count - row * columns)
+        left = center_x - (in_row * width + (in_row - 1) * gap_x) / 2
+
+        rects.append(
+            pygame.Rect(
+                left + column * (width + gap_x),
+                top + row * (height + gap_y),
+                width,
+                height,
+            )
+        )
+
+    return rects